@@ -0,0 +1,148 @@
+"""Request, SQL and queue metrics of the API process, exported on ``/metrics``.
+
+``MetricsMiddleware`` times each request up to the last body chunk,
+labelled by the route template (``/api/jobs/{job_id}``) so the series
+count stays bounded; unmatched paths share one label. SQL statements are
+counted and timed through SQLAlchemy engine events and attributed to the
+request that ran them, including statements run in the threadpool by
+sync routes.
+"""
+import contextvars
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.core.metrics import Registry
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests", "HTTP requests served.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time until the response was sent.", ("method", "route")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "Requests being handled.", ("method",)
+)
+db_queries = registry.counter(
+    "db_queries", "SQL statements executed.", ()
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Time of single SQL statements.", (),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+db_queries_per_request = registry.histogram(
+    "http_request_db_queries", "SQL statements per request.", ("route",),
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250)
+)
+db_time_per_request = registry.histogram(
+    "http_request_db_seconds", "Total SQL time per request.", ("route",)
+)
+job_queue_jobs = registry.gauge(
+    "job_queue_jobs", "Jobs in the shared queue.", ("state",)
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections", "Connections of the API's database pools.", ("engine", "state")
+)
+
+# [statement count, seconds] of the request being handled
+_request_db = contextvars.ContextVar("request_db", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    db_queries.inc()
+    db_query_duration.observe(elapsed)
+    totals = _request_db.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def route_label(scope) -> str:
+    """Request path with path parameter values put back as ``{name}``."""
+    if scope.get("route") is None:
+        return "unmatched"
+    params = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    if not params:
+        return scope["path"]
+    return "/".join(
+        "{" + params[segment] + "}" if segment in params else segment
+        for segment in scope["path"].split("/")
+    )
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        totals = [0, 0.0]
+        token = _request_db.set(totals)
+        status = {"code": 500, "done": False}
+        in_progress = http_requests_in_progress.labels(method)
+        in_progress.inc()
+
+        def finish():
+            if status["done"]:
+                return
+            status["done"] = True
+            in_progress.dec()
+            route = route_label(scope)
+            http_requests.labels(method, route, status["code"]).inc()
+            http_request_duration.labels(method, route).observe(time.perf_counter() - start)
+            db_queries_per_request.labels(route).observe(totals[0])
+            db_time_per_request.labels(route).observe(totals[1])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Background tasks run after this and are not counted
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+            _request_db.reset(token)
+
+def register_collectors(queue_stats, pool_stats):
+    """Gauges read at scrape time from the job queue and the connection pools."""
+    def queue_depth():
+        stats = queue_stats()
+        return {("pending",): stats["pending"], ("inflight",): stats["inflight"]}
+
+    def pool_usage():
+        values = {}
+        for engine_name, stats in pool_stats().items():
+            for state in ("size", "checked_out", "overflow"):
+                if state in stats:
+                    values[(engine_name, state)] = stats[state]
+        return values
+
+    job_queue_jobs.set_function(queue_depth)
+    db_pool_connections.set_function(pool_usage)
@@ -1,20 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-import uvicorn
 
-from backend.database import get_db, engine
-from backend.models import Base
-from backend.api.routes import jobs, auth, experiments, metrics
+from backend.database import get_db, dispose_engines, pool_stats
+from backend.api.instrumentation import MetricsMiddleware, register_collectors, registry
+from backend.api.routes import jobs, auth, experiments, metrics, scheduler
+from backend.core.clients import close_clients
 from backend.core.config import settings
+from backend.core.metrics import CONTENT_TYPE
+from backend.services.event_service import event_service
+from backend.services.job_service import job_service
+from backend.services.log_service import log_service
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tables come from migrations (alembic -c backend/alembic.ini upgrade head).
+    # Build the services once, on the serving event loop, before requests
+    # race to; the pools only connect when the first command runs.
+    job_service.scheduler
+    job_service.cache
+    event_service.broker
+    log_service.async_redis
+    yield
+    await close_clients()
+    await dispose_engines()
 
 app = FastAPI(
     title="NexusML API",
     description="Distributed ML Training Platform",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -26,11 +43,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and SQL time, exported on /metrics
+app.add_middleware(MetricsMiddleware)
+register_collectors(lambda: job_service.queue.stats(), pool_stats)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 app.include_router(experiments.router, prefix="/api/experiments", tags=["experiments"])
 app.include_router(metrics.router, tags=["metrics"])
+app.include_router(scheduler.router, prefix="/api/scheduler", tags=["scheduler"])
 
 @app.get("/")
 def read_root():
@@ -40,6 +62,21 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+def db_pool_stats():
+    """Connection pool usage for monitoring."""
+    return pool_stats()
+
+@app.get("/health/cache")
+def job_cache_stats():
+    """Hit/miss counters of this process's job cache."""
+    return job_service.cache.stats
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Metrics of this API process in Prometheus text format."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.api.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,7 +1,81 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List
+import uuid
+
+from backend.database import get_db
+from backend.schemas.experiment import ExperimentCreate, ExperimentResponse, ExperimentDetail
+from backend.services.experiment_service import experiment_service
+from backend.api.deps import get_current_user
+from backend.models.user import User
 
 router = APIRouter()
 
-@router.get("/")
-def get_experiments():
-    return []
+@router.post("/", response_model=ExperimentDetail, status_code=status.HTTP_201_CREATED)
+def create_experiment(
+    experiment_data: ExperimentCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start a hyperparameter sweep.
+
+    Example request body:
+    {
+        "name": "ResNet18 LR sweep",
+        "base_config": {"model": "resnet18", "dataset": "cifar10", "epochs": 10,
+                        "batch_size": 128, "learning_rate": 0.1, "optimizer": "sgd"},
+        "search_space": {
+            "learning_rate": {"type": "loguniform", "low": 0.0001, "high": 0.5},
+            "batch_size": {"type": "choice", "values": [64, 128, 256]}
+        },
+        "algorithm": "bayesian",
+        "objective_metric": "train_loss",
+        "pruner": {"type": "asha", "min_steps": 200, "eta": 3},
+        "max_trials": 30,
+        "max_concurrency": 4
+    }
+    """
+    return experiment_service.create_experiment(db, experiment_data, current_user.id)
+
+@router.get("/", response_model=List[ExperimentResponse])
+def list_experiments(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List the current user's experiments, newest first."""
+    return experiment_service.get_user_experiments(db, current_user.id, skip, limit)
+
+@router.get("/{experiment_id}", response_model=ExperimentDetail)
+def get_experiment(
+    experiment_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get an experiment with its trials."""
+    experiment = experiment_service.get_experiment(db, experiment_id)
+
+    if not experiment or experiment.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+
+    return experiment
+
+@router.delete("/{experiment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_experiment(
+    experiment_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel an experiment and its running trials."""
+    experiment = experiment_service.get_experiment(db, experiment_id)
+
+    if not experiment or experiment.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+
+    if experiment.status != "running":
+        raise HTTPException(status_code=400, detail="Experiment already finished")
+
+    experiment_service.cancel_experiment(db, experiment_id)
+    return None
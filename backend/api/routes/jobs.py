@@ -1,21 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid
 
-from backend.database import get_db
-from backend.schemas.job import JobCreate, JobResponse, JobUpdate
-from backend.services import job_service
+from backend.database import get_db, get_async_db, async_session
+from backend.schemas.artifact import ArtifactCreate, ArtifactResponse
+from backend.schemas.job import MAX_BULK_JOBS, JobCreate, JobBulkCreate, JobBulkUpdateItem, JobResponse, JobStatusResponse, JobUpdate
+from backend.services.artifact_service import artifact_service
+from backend.services.job_service import job_service, async_job_service, encode_cursor, METRIC_AGGREGATIONS
+from backend.services.log_service import log_service
+from backend.services.event_service import event_service, status_event, TERMINAL_STATUSES
+from backend.services.experiment_service import experiment_service
+from backend.services.metric_service import async_metric_service
 from backend.api.deps import get_current_user
 from backend.models.user import User
 
 router = APIRouter()
 
+# Ids per bulk status request; long query strings get cut by proxies
+MAX_BULK_STATUS_IDS = 500
+
 @router.post("/", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
-def create_job(
+async def create_job(
     job_data: JobCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -37,29 +48,96 @@ def create_job(
     }
     """
     # Create job in database
-    job = job_service.create_job(db, job_data, current_user.id)
+    job = await async_job_service.create_job(db, job_data, current_user.id)
     
     # Add to execution queue (background task)
-    background_tasks.add_task(job_service.enqueue_job, db, job.id)
+    background_tasks.add_task(async_job_service.enqueue_job, job)
     
     return job
 
 @router.get("/", response_model=List[JobResponse])
 def list_jobs(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     status: str = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all jobs for the current user."""
-    jobs = job_service.get_user_jobs(
-        db, 
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        status_filter=status
-    )
+    """
+    List all jobs for the current user, newest first.
+
+    For deep pages pass the ``X-Next-Cursor`` response header back as
+    ``cursor`` instead of using ``skip``; it is set whenever a full page
+    was returned.
+    """
+    try:
+        jobs = job_service.get_user_jobs(
+            db, 
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            status_filter=status,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if len(jobs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(jobs[-1])
+    return jobs
+
+# Declared before /{job_id} so "batch" is not parsed as a job id
+@router.post("/batch", response_model=List[JobResponse], status_code=status.HTTP_201_CREATED)
+async def create_jobs(
+    batch: JobBulkCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Submit many training jobs at once.
+
+    The body is ``{"jobs": [...]}`` with the same objects ``POST /`` takes.
+    All jobs are inserted in one statement (all or nothing) and enqueued in
+    one pipelined call; the response lists them in request order.
+    """
+    jobs = await async_job_service.create_jobs(db, batch.jobs, current_user.id)
+    background_tasks.add_task(async_job_service.enqueue_jobs, jobs)
+    return jobs
+
+@router.get("/batch", response_model=List[JobStatusResponse])
+def get_jobs_status(
+    ids: List[uuid.UUID] = Query(..., max_length=MAX_BULK_STATUS_IDS),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of several jobs in one request, e.g.
+    ``/api/jobs/batch?ids=<id1>&ids=<id2>``. Unknown ids and other users'
+    jobs are omitted.
+    """
+    return job_service.get_jobs_status(db, ids, current_user.id)
+
+@router.patch("/batch", response_model=List[JobStatusResponse])
+def update_jobs(
+    updates: List[JobBulkUpdateItem],
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Apply several job updates in one request (used by workers to send
+    coalesced status changes). Returns the jobs that exist; unknown ids
+    are skipped.
+    """
+    if len(updates) > MAX_BULK_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_JOBS} updates per request")
+    
+    jobs = job_service.update_jobs(db, updates)
+    for update in updates:
+        if update.status in TERMINAL_STATUSES:
+            background_tasks.add_task(experiment_service.on_job_finished, update.id)
     return jobs
 
 @router.get("/{job_id}", response_model=JobResponse)
@@ -69,7 +147,7 @@ def get_job(
     current_user: User = Depends(get_current_user)
 ):
     """Get details of a specific job."""
-    job = job_service.get_job(db, job_id)
+    job = job_service.get_job_cached(db, job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -79,14 +157,33 @@ def get_job(
     
     return job
 
+@router.patch("/{job_id}", response_model=JobResponse)
+def update_job(
+    job_id: uuid.UUID,
+    update_data: JobUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Update a job's status and results (used by workers to report progress)."""
+    job = job_service.update_job(db, job_id, update_data)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if update_data.status in TERMINAL_STATUSES:
+        background_tasks.add_task(experiment_service.on_job_finished, job_id)
+    
+    return job
+
 @router.delete("/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
 def cancel_job(
     job_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Cancel a running or queued job."""
-    job = job_service.get_job(db, job_id)
+    job = job_service.get_job_cached(db, job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -98,20 +195,161 @@ def cancel_job(
         raise HTTPException(status_code=400, detail="Job already finished")
     
     job_service.cancel_job(db, job_id)
+    background_tasks.add_task(experiment_service.on_job_finished, job_id)
     return None
 
 @router.get("/{job_id}/metrics")
 def get_job_metrics(
     job_id: uuid.UUID,
     metric_name: str = None,
+    format: str = "points",
+    max_points: Optional[int] = Query(None, ge=3, le=20000),
+    step_min: Optional[int] = None,
+    step_max: Optional[int] = None,
+    aggregation: str = "lttb",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get training metrics for a job."""
-    job = job_service.get_job(db, job_id)
+    """
+    Get training metrics for a job.
+
+    With ``format=columnar`` each metric is returned as ``steps``/``values``
+    arrays, limited to ``step_min``..``step_max`` and downsampled to at most
+    ``max_points`` using ``aggregation`` (lttb, minmax, mean or none).
+    """
+    job = job_service.get_job_cached(db, job_id)
     
     if not job or job.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    if format == "columnar":
+        if aggregation not in METRIC_AGGREGATIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown aggregation: {aggregation}")
+        metrics = job_service.get_job_metric_series(
+            db,
+            job_id,
+            metric_name=metric_name,
+            max_points=max_points,
+            step_min=step_min,
+            step_max=step_max,
+            aggregation=aggregation
+        )
+        return {"job_id": str(job_id), "aggregation": aggregation, "metrics": metrics}
+    
+    if format != "points":
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    
     metrics = job_service.get_job_metrics(db, job_id, metric_name)
     return {"job_id": str(job_id), "metrics": metrics}
+
+@router.get("/{job_id}/logs")
+def get_job_logs(
+    job_id: uuid.UUID,
+    offset: str = Query("0", pattern=r"^\d+(-\d+)?$"),
+    limit: int = Query(1000, ge=1, le=10000),
+    follow: bool = False,
+    last_event_id: Optional[str] = Header(None, pattern=r"^\d+(-\d+)?$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the output of a job.
+
+    Returns up to ``limit`` lines after ``offset``; pass the returned
+    ``next_offset`` back to tail the log. With ``follow=true`` the lines are
+    streamed as server-sent events until the job ends (resumable through
+    the ``Last-Event-ID`` header).
+    """
+    job = job_service.get_job_cached(db, job_id)
+    
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if follow:
+        async def job_status():
+            async with async_session() as session:
+                return (await async_job_service.get_job(session, job_id)).status
+
+        return StreamingResponse(
+            log_service.follow_logs(job_id, job_status, last_event_id or offset),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    return {"job_id": str(job_id), **log_service.read_logs(job_id, offset, limit)}
+
+@router.get("/{job_id}/events")
+def stream_job_events(
+    job_id: uuid.UUID,
+    since_step: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None, pattern=r"^\d+$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Push status transitions and new metric points as server-sent events.
+
+    Pass ``since_step`` (or reconnect with ``Last-Event-ID``) to first
+    receive the metric points stored after that step. The stream ends once
+    the job reaches a terminal status.
+    """
+    job = job_service.get_job_cached(db, job_id)
+    
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if last_event_id is not None:
+        since_step = int(last_event_id)
+    
+    async def snapshot():
+        async with async_session() as session:
+            return status_event(await async_job_service.get_job(session, job_id))
+    
+    async def replay(step: int):
+        async with async_session() as session:
+            async for page in async_metric_service.iter_metrics_since(session, job_id, step):
+                yield page
+    
+    return StreamingResponse(
+        event_service.job_events(job_id, snapshot, replay, since_step),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{job_id}/artifacts", response_model=List[ArtifactResponse])
+def list_job_artifacts(
+    job_id: uuid.UUID,
+    artifact_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List files produced by a job, e.g. ``artifact_type=checkpoint``."""
+    job = job_service.get_job_cached(db, job_id)
+    
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return artifact_service.get_job_artifacts(db, job_id, artifact_type)
+
+@router.post("/{job_id}/artifacts", response_model=ArtifactResponse, status_code=status.HTTP_201_CREATED)
+def register_job_artifact(
+    job_id: uuid.UUID,
+    artifact_data: ArtifactCreate,
+    db: Session = Depends(get_db)
+):
+    """Register a file written by a job (used by training scripts)."""
+    if not job_service.get_job_cached(db, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return artifact_service.create_artifact(db, job_id, artifact_data)
+
+@router.delete("/{job_id}/artifacts", status_code=status.HTTP_204_NO_CONTENT)
+def delete_job_artifact(
+    job_id: uuid.UUID,
+    file_path: str,
+    db: Session = Depends(get_db)
+):
+    """Forget a file the job deleted (used by training scripts)."""
+    if not artifact_service.delete_artifact(db, job_id, file_path):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return None
@@ -1,26 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import uuid
 
-from backend.database import get_db
-from backend.schemas.metric import MetricCreate
-from backend.services import metric_service
+from backend.database import get_async_db
+from backend.schemas.metric import MetricCreate, MetricBatchResponse
+from backend.services.experiment_service import experiment_service
+from backend.services.job_service import async_job_service
+from backend.services.metric_service import async_metric_service
 from backend.api.deps import get_current_user
 from backend.models.user import User
 
 router = APIRouter()
 
 @router.post("/api/jobs/{job_id}/metrics", status_code=status.HTTP_201_CREATED)
-def create_metric_for_job(
+async def create_metric_for_job(
     job_id: uuid.UUID,
     metric_data: MetricCreate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Create a new metric for a job.
     """
-    # TODO: check if user has access to the job
-    metric = metric_service.create_metric(db, job_id, metric_data)
+    if not await async_job_service.get_job_cached(db, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    metric = await async_metric_service.create_metric(db, job_id, metric_data)
+    background_tasks.add_task(experiment_service.on_metrics, job_id, metric_data.step)
     return metric
+
+@router.post(
+    "/api/jobs/{job_id}/metrics/batch",
+    response_model=MetricBatchResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def create_metrics_for_job(
+    job_id: uuid.UUID,
+    metrics: List[MetricCreate],
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create many metrics for a job in one request.
+
+    The body is a JSON array of metric objects, e.g.
+    [{"step": 10, "metric_name": "train_loss", "metric_value": 0.42,
+      "timestamp": "2024-01-01T00:00:00"}, ...]
+    """
+    if not await async_job_service.get_job_cached(db, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    inserted = await async_metric_service.create_metrics(db, job_id, metrics)
+    if inserted:
+        # Experiment trials are checked against their pruning rungs
+        background_tasks.add_task(experiment_service.on_metrics, job_id, max(m.step for m in metrics))
+    return {"job_id": str(job_id), "inserted": inserted}
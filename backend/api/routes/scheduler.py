@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from backend.services.job_service import job_service
+
+router = APIRouter()
+
+@router.get("/stats")
+def get_scheduler_stats():
+    """Queue depth, queue-wait percentiles and cluster utilization."""
+    return job_service.scheduler.stats()
+
+@router.get("/workers")
+def get_workers():
+    """Live workers with their advertised capacity and usage."""
+    return job_service.scheduler.registry.live_workers()
@@ -0,0 +1,58 @@
+"""Redis clients shared by every service in one process.
+
+Clients are built on first use from ``settings.REDIS_URL``, so importing
+a service opens no connection. The sync client sits on a bounded,
+blocking pool; the async one is unbounded because log followers and the
+event broker hold a connection for as long as they listen.
+"""
+import threading
+
+import redis
+import redis.asyncio as aioredis
+
+from backend.core.config import settings
+
+_lock = threading.Lock()
+_redis = None
+_async_redis = None
+
+def get_redis() -> redis.Redis:
+    """The process's sync Redis client."""
+    global _redis
+    if _redis is None:
+        with _lock:
+            if _redis is None:
+                pool = redis.BlockingConnectionPool.from_url(
+                    settings.REDIS_URL,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    timeout=settings.REDIS_POOL_TIMEOUT,
+                    decode_responses=True,
+                    health_check_interval=30
+                )
+                _redis = redis.Redis(connection_pool=pool)
+    return _redis
+
+def get_async_redis() -> aioredis.Redis:
+    """The process's async Redis client; use it from one event loop only."""
+    global _async_redis
+    if _async_redis is None:
+        with _lock:
+            if _async_redis is None:
+                _async_redis = aioredis.Redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    health_check_interval=30
+                )
+    return _async_redis
+
+async def close_clients():
+    """Close both pools; the next get_* call builds new ones."""
+    global _redis, _async_redis
+    with _lock:
+        sync_client, async_client = _redis, _async_redis
+        _redis = _async_redis = None
+    if sync_client is not None:
+        sync_client.close()
+        sync_client.connection_pool.disconnect()
+    if async_client is not None:
+        await async_client.aclose()
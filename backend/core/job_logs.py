@@ -0,0 +1,15 @@
+"""Redis stream layout for job logs, shared by the API and the workers.
+
+Each job's output is appended line by line to a capped stream. A final
+entry with an ``eof`` field marks the end of the run.
+"""
+
+LOG_STREAM_PREFIX = "job_logs"
+# Approximate cap on lines kept per job in Redis
+LOG_STREAM_MAXLEN = 50000
+# Finished logs are kept this long
+LOG_STREAM_TTL_SECONDS = 7 * 24 * 3600
+
+
+def log_stream_key(job_id) -> str:
+    return f"{LOG_STREAM_PREFIX}:{job_id}"
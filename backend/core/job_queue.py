@@ -0,0 +1,264 @@
+"""Redis job queue shared by the API and the workers.
+
+Pending jobs live in a sorted set ordered by priority score. Claiming a job
+atomically moves it into an in-flight set whose score is the lease expiry.
+Workers extend leases with heartbeats and acknowledge finished jobs; expired
+leases are put back on the pending set by ``reap_expired`` so a job is never
+lost when a worker dies mid-run.
+
+This module only depends on ``redis`` so the worker image can import it
+without the rest of the backend.
+"""
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_QUEUE = "job_queue"
+DEFAULT_LEASE_SECONDS = 60
+
+# Lease deadlines use the Redis server clock so worker clock skew does not
+# matter.
+_NOW = """
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+"""
+
+# KEYS: pending, inflight, owners   ARGV: lease_seconds, worker_id
+_CLAIM = _NOW + """
+local item = redis.call('ZPOPMIN', KEYS[1])
+if #item == 0 then
+    return false
+end
+local job_id = item[1]
+redis.call('ZADD', KEYS[2], t + tonumber(ARGV[1]), job_id)
+redis.call('HSET', KEYS[3], job_id, ARGV[2])
+return job_id
+"""
+
+# KEYS: pending, inflight, owners   ARGV: job_id, lease_seconds, worker_id
+_CLAIM_JOB = _NOW + """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[2], t + tonumber(ARGV[2]), ARGV[1])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+return 1
+"""
+
+# KEYS: inflight, owners   ARGV: job_id, worker_id, lease_seconds
+_HEARTBEAT = _NOW + """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', t + tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+
+# KEYS: inflight, owners, scores, meta, attempts   ARGV: job_id, worker_id
+_ACK = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+redis.call('HDEL', KEYS[5], ARGV[1])
+return 1
+"""
+
+# KEYS: pending, inflight, owners, scores, signal   ARGV: limit
+_REAP = _NOW + """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', t, 'LIMIT', 0, tonumber(ARGV[1]))
+for _, job_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], job_id)
+    redis.call('HDEL', KEYS[3], job_id)
+    local score = redis.call('HGET', KEYS[4], job_id)
+    if not score then
+        score = t
+    end
+    redis.call('ZADD', KEYS[1], score, job_id)
+    redis.call('LPUSH', KEYS[5], 1)
+end
+if #expired > 0 then
+    redis.call('LTRIM', KEYS[5], 0, 99)
+end
+return expired
+"""
+
+
+class JobQueue:
+    def __init__(self, redis_client, name: str = DEFAULT_QUEUE, lease_seconds: int = DEFAULT_LEASE_SECONDS):
+        self.redis = redis_client
+        self.name = name
+        self.lease_seconds = lease_seconds
+
+        self.pending_key = name
+        self.inflight_key = f"{name}:inflight"
+        self.owners_key = f"{name}:owners"
+        self.scores_key = f"{name}:scores"
+        self.meta_key = f"{name}:meta"
+        self.signal_key = f"{name}:signal"
+        self.attempts_key = f"{name}:attempts"
+
+        self._claim = redis_client.register_script(_CLAIM)
+        self._claim_job = redis_client.register_script(_CLAIM_JOB)
+        self._heartbeat = redis_client.register_script(_HEARTBEAT)
+        self._ack = redis_client.register_script(_ACK)
+        self._reap = redis_client.register_script(_REAP)
+
+    @staticmethod
+    def score(priority: int, enqueued_at: Optional[float] = None) -> float:
+        """Higher priority first, then FIFO within a priority."""
+        if enqueued_at is None:
+            enqueued_at = time.time()
+        return -priority * 1000000 + enqueued_at
+
+    def enqueue(self, job_id: str, priority: int = 0, resources: Optional[Dict[str, int]] = None):
+        """Add a job to the pending set and wake one blocked worker.
+
+        ``resources`` (e.g. ``gpu_count``/``memory_gb``) is kept alongside
+        the job for the scheduler.
+        """
+        self.enqueue_many([(job_id, priority, resources)])
+
+    def enqueue_many(self, jobs: List[Tuple[str, int, Optional[Dict[str, int]]]]):
+        """Enqueue ``(job_id, priority, resources)`` tuples in one round trip.
+
+        Jobs of equal priority keep their list order.
+        """
+        if not jobs:
+            return
+        now = time.time()
+        scores, metas = {}, {}
+        for offset, (job_id, priority, resources) in enumerate(jobs):
+            job_id = str(job_id)
+            # Microsecond offsets keep FIFO order within the batch
+            enqueued_at = now + offset * 1e-6
+            scores[job_id] = self.score(priority, enqueued_at)
+            metas[job_id] = json.dumps({"priority": priority, "enqueued_at": enqueued_at, **(resources or {})})
+
+        pipe = self.redis.pipeline()
+        pipe.hset(self.scores_key, mapping=scores)
+        pipe.hset(self.meta_key, mapping=metas)
+        pipe.zadd(self.pending_key, scores)
+        # One wake-up per job, capped like the signal list itself
+        pipe.lpush(self.signal_key, *([1] * min(len(jobs), 100)))
+        pipe.ltrim(self.signal_key, 0, 99)
+        pipe.execute()
+
+    def claim(self, worker_id: str) -> Optional[str]:
+        """Atomically pop the best pending job and lease it to ``worker_id``."""
+        job_id = self._claim(
+            keys=[self.pending_key, self.inflight_key, self.owners_key],
+            args=[self.lease_seconds, worker_id]
+        )
+        return job_id or None
+
+    def claim_job(self, job_id: str, worker_id: str) -> bool:
+        """Lease a specific pending job. False if someone else got it first."""
+        return bool(self._claim_job(
+            keys=[self.pending_key, self.inflight_key, self.owners_key],
+            args=[str(job_id), self.lease_seconds, worker_id]
+        ))
+
+    def wait(self, timeout: float):
+        """Sleep until a job is enqueued or requeued, or ``timeout`` passes."""
+        self.redis.blpop(self.signal_key, timeout=timeout)
+
+    def dequeue(self, worker_id: str, timeout: float = 5) -> Optional[str]:
+        """Block up to ``timeout`` seconds for a job and lease it."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job_id = self.claim(worker_id)
+            if job_id:
+                return job_id
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # Woken by enqueue/reap; the 1s cap covers wake-ups lost to races
+            self.wait(min(remaining, 1.0))
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease. Returns False if the worker no longer owns the job."""
+        return bool(self._heartbeat(
+            keys=[self.inflight_key, self.owners_key],
+            args=[str(job_id), worker_id, self.lease_seconds]
+        ))
+
+    def ack(self, job_id: str, worker_id: str) -> bool:
+        """Mark a leased job as done and forget it.
+
+        A no-op returning False unless ``worker_id`` still holds the lease,
+        so a worker whose lease expired cannot drop the requeued job.
+        """
+        return bool(self._ack(
+            keys=[self.inflight_key, self.owners_key, self.scores_key, self.meta_key, self.attempts_key],
+            args=[str(job_id), worker_id]
+        ))
+
+    def requeue(self, job_id: str):
+        """Give a leased job back to the pending set with its original score."""
+        job_id = str(job_id)
+        score = self.redis.hget(self.scores_key, job_id) or self.score(0)
+
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.inflight_key, job_id)
+        pipe.hdel(self.owners_key, job_id)
+        pipe.zadd(self.pending_key, {job_id: float(score)})
+        pipe.lpush(self.signal_key, 1)
+        pipe.ltrim(self.signal_key, 0, 99)
+        pipe.execute()
+
+    def record_attempt(self, job_id: str) -> int:
+        """Count a failed run of a job; returns the number of failed runs so far."""
+        return self.redis.hincrby(self.attempts_key, str(job_id), 1)
+
+    def remove(self, job_id: str):
+        """Drop a job from the queue whether it is pending or leased."""
+        job_id = str(job_id)
+
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.pending_key, job_id)
+        pipe.zrem(self.inflight_key, job_id)
+        pipe.hdel(self.owners_key, job_id)
+        pipe.hdel(self.scores_key, job_id)
+        pipe.hdel(self.meta_key, job_id)
+        pipe.hdel(self.attempts_key, job_id)
+        pipe.execute()
+
+    def pending(self, limit: int = 200) -> List[tuple]:
+        """Peek at the best ``limit`` pending jobs as ``(job_id, meta)`` pairs."""
+        job_ids = self.redis.zrange(self.pending_key, 0, limit - 1)
+        if not job_ids:
+            return []
+        metas = self.redis.hmget(self.meta_key, job_ids)
+        return [
+            (job_id, json.loads(meta) if meta else {})
+            for job_id, meta in zip(job_ids, metas)
+        ]
+
+    def pending_meta(self, job_id: str) -> dict:
+        meta = self.redis.hget(self.meta_key, str(job_id))
+        return json.loads(meta) if meta else {}
+
+    def reap_expired(self, limit: int = 100) -> List[str]:
+        """Requeue jobs whose lease has expired. Returns the requeued IDs."""
+        return self._reap(
+            keys=[
+                self.pending_key,
+                self.inflight_key,
+                self.owners_key,
+                self.scores_key,
+                self.signal_key
+            ],
+            args=[limit]
+        ) or []
+
+    def stats(self) -> dict:
+        pipe = self.redis.pipeline()
+        pipe.zcard(self.pending_key)
+        pipe.zcard(self.inflight_key)
+        pending, inflight = pipe.execute()
+        return {"pending": pending, "inflight": inflight}
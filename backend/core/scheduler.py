@@ -0,0 +1,199 @@
+"""Capacity-aware job placement on top of ``JobQueue``.
+
+Workers advertise their total and used capacity (GPUs, memory) through
+heartbeats into a registry. When a worker asks for work, the scheduler looks
+at the head of the pending queue and picks a job that fits the worker's free
+capacity:
+
+* jobs are ranked by effective priority, which is the submitted priority
+  plus an aging bonus that grows with queue wait;
+* within the best priority band that has a fitting job, the largest job
+  that fits is taken (best fit), so small jobs do not fragment big nodes;
+* a job that has waited longer than ``starvation_seconds`` reserves any
+  worker that could hold it once drained, so large jobs are not starved
+  by a stream of small ones.
+
+Like ``job_queue``, this module only depends on ``redis``.
+"""
+import json
+import math
+import time
+from typing import Dict, List, Optional
+
+from backend.core.job_queue import JobQueue
+
+WORKERS_KEY = "scheduler:workers"
+WAIT_SAMPLES_KEY = "scheduler:wait_samples"
+
+DEFAULT_WORKER_TTL = 30
+DEFAULT_AGING_SECONDS = 300
+DEFAULT_STARVATION_SECONDS = 1800
+DEFAULT_SCAN_LIMIT = 200
+WAIT_SAMPLE_SIZE = 1000
+
+
+def job_fits(meta: dict, gpus: int, memory_gb: int) -> bool:
+    return meta.get("gpu_count", 0) <= gpus and meta.get("memory_gb", 0) <= memory_gb
+
+
+class WorkerRegistry:
+    """Worker capacity advertised through heartbeats."""
+
+    def __init__(self, redis_client, ttl: int = DEFAULT_WORKER_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+
+    def heartbeat(
+        self,
+        worker_id: str,
+        gpu_total: int,
+        memory_total: int,
+        gpu_used: int = 0,
+        memory_used: int = 0,
+        running: int = 0
+    ):
+        self.redis.hset(WORKERS_KEY, worker_id, json.dumps({
+            "gpu_total": gpu_total,
+            "memory_total": memory_total,
+            "gpu_used": gpu_used,
+            "memory_used": memory_used,
+            "running": running,
+            "last_seen": time.time()
+        }))
+
+    def deregister(self, worker_id: str):
+        self.redis.hdel(WORKERS_KEY, worker_id)
+
+    def live_workers(self) -> Dict[str, dict]:
+        """Workers seen within the TTL; stale entries are pruned."""
+        now = time.time()
+        live, stale = {}, []
+        for worker_id, raw in self.redis.hgetall(WORKERS_KEY).items():
+            info = json.loads(raw)
+            if now - info["last_seen"] > self.ttl:
+                stale.append(worker_id)
+            else:
+                live[worker_id] = info
+        if stale:
+            self.redis.hdel(WORKERS_KEY, *stale)
+        return live
+
+
+class Scheduler:
+    def __init__(
+        self,
+        queue: JobQueue,
+        aging_seconds: float = DEFAULT_AGING_SECONDS,
+        starvation_seconds: float = DEFAULT_STARVATION_SECONDS,
+        scan_limit: int = DEFAULT_SCAN_LIMIT
+    ):
+        self.queue = queue
+        self.redis = queue.redis
+        self.registry = WorkerRegistry(queue.redis)
+        self.aging_seconds = aging_seconds
+        self.starvation_seconds = starvation_seconds
+        self.scan_limit = scan_limit
+
+    def effective_priority(self, meta: dict, now: float) -> float:
+        """Submitted priority plus one level per ``aging_seconds`` waited."""
+        waited = max(0.0, now - meta.get("enqueued_at", now))
+        return meta.get("priority", 0) + waited / self.aging_seconds
+
+    def select_job(self, free_gpus: int, free_memory: int, total_gpus: int, total_memory: int) -> Optional[str]:
+        """Pick the pending job to run on a worker with the given capacity."""
+        now = time.time()
+        candidates = self.queue.pending(self.scan_limit)
+        candidates.sort(key=lambda c: (-self.effective_priority(c[1], now), c[1].get("enqueued_at", now)))
+
+        best_band = None
+        best = None
+        for job_id, meta in candidates:
+            band = math.floor(self.effective_priority(meta, now))
+            if best is not None and band < best_band:
+                break
+
+            if not job_fits(meta, free_gpus, free_memory):
+                waited = now - meta.get("enqueued_at", now)
+                if best is None and waited > self.starvation_seconds and job_fits(meta, total_gpus, total_memory):
+                    # Hold this worker for the starving job until it drains
+                    return None
+                continue
+
+            footprint = (meta.get("gpu_count", 0), meta.get("memory_gb", 0))
+            if best is None or footprint > best[1]:
+                best = (job_id, footprint)
+                best_band = band
+
+        return best[0] if best else None
+
+    def next_job(
+        self,
+        worker_id: str,
+        free_gpus: int,
+        free_memory: int,
+        total_gpus: int,
+        total_memory: int,
+        timeout: float = 5
+    ) -> Optional[str]:
+        """Block up to ``timeout`` seconds for a job that fits and lease it."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job_id = self.select_job(free_gpus, free_memory, total_gpus, total_memory)
+            if job_id:
+                meta = self.queue.pending_meta(job_id)
+                if self.queue.claim_job(job_id, worker_id):
+                    self._record_wait(meta)
+                    return job_id
+                # Lost the race to another worker; pick again right away
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.queue.wait(min(remaining, 1.0))
+
+    def _record_wait(self, meta: dict):
+        if "enqueued_at" not in meta:
+            return
+        pipe = self.redis.pipeline()
+        pipe.lpush(WAIT_SAMPLES_KEY, time.time() - meta["enqueued_at"])
+        pipe.ltrim(WAIT_SAMPLES_KEY, 0, WAIT_SAMPLE_SIZE - 1)
+        pipe.execute()
+
+    def stats(self) -> dict:
+        """Queue-wait percentiles, cluster utilization and queue depth."""
+        waits = sorted(float(w) for w in self.redis.lrange(WAIT_SAMPLES_KEY, 0, -1))
+        workers = self.registry.live_workers()
+
+        gpu_total = sum(w["gpu_total"] for w in workers.values())
+        memory_total = sum(w["memory_total"] for w in workers.values())
+        gpu_used = sum(w["gpu_used"] for w in workers.values())
+        memory_used = sum(w["memory_used"] for w in workers.values())
+
+        pending = self.queue.pending(self.scan_limit)
+        unschedulable = [
+            job_id for job_id, meta in pending
+            if not any(job_fits(meta, w["gpu_total"], w["memory_total"]) for w in workers.values())
+        ]
+
+        return {
+            "queue": self.queue.stats(),
+            "queue_wait_seconds": {
+                "samples": len(waits),
+                "p50": _percentile(waits, 50),
+                "p95": _percentile(waits, 95),
+                "max": waits[-1] if waits else None
+            },
+            "workers": len(workers),
+            "running_jobs": sum(w["running"] for w in workers.values()),
+            "gpu_utilization": gpu_used / gpu_total if gpu_total else None,
+            "memory_utilization": memory_used / memory_total if memory_total else None,
+            "unschedulable_jobs": unschedulable
+        }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
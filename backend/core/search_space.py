@@ -0,0 +1,54 @@
+"""Search spaces of experiments: config merging, grid enumeration and sampling.
+
+A search space maps config keys (dotted for nested keys, e.g.
+``performance.num_workers``) to parameter specs:
+
+* ``{"type": "choice", "values": [...]}``
+* ``{"type": "uniform", "low": a, "high": b}``
+* ``{"type": "loguniform", "low": a, "high": b}``
+* ``{"type": "int", "low": a, "high": b}`` (inclusive)
+
+Shared by the experiment schema, which validates sample trials, and the
+search service, which suggests them.
+"""
+import copy
+import math
+import random
+from typing import Any, Dict
+
+def merge_params(base_config: dict, params: Dict[str, Any]) -> dict:
+    """Copy of ``base_config`` with dotted ``params`` keys set."""
+    config = copy.deepcopy(base_config)
+    for key, value in params.items():
+        target = config
+        *parents, leaf = key.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    return config
+
+def grid_size(space: Dict[str, dict]) -> int:
+    return math.prod(len(spec["values"]) for spec in space.values())
+
+def grid_point(space: Dict[str, dict], index: int) -> Dict[str, Any]:
+    """The ``index``-th grid combination, in ``itertools.product`` order."""
+    params = {}
+    for key, spec in reversed(list(space.items())):
+        index, position = divmod(index, len(spec["values"]))
+        params[key] = spec["values"][position]
+    return dict(reversed(list(params.items())))
+
+def sample_param(spec: dict, rng: random.Random):
+    kind = spec["type"]
+    if kind == "choice":
+        return rng.choice(spec["values"])
+    if kind == "uniform":
+        return rng.uniform(spec["low"], spec["high"])
+    if kind == "loguniform":
+        return math.exp(rng.uniform(math.log(spec["low"]), math.log(spec["high"])))
+    if kind == "int":
+        return rng.randint(int(spec["low"]), int(spec["high"]))
+    raise ValueError(f"Unknown parameter type: {kind}")
+
+def sample_random(space: Dict[str, dict], rng: random.Random) -> Dict[str, Any]:
+    return {key: sample_param(spec, rng) for key, spec in space.items()}
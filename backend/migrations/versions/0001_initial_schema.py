@@ -0,0 +1,188 @@
+"""Initial schema: users, jobs, metrics, artifacts and experiments
+
+Databases set up by the API's old ``create_all`` at startup have no
+``alembic_version``; this revision adopts them by creating only the
+tables and indexes they lack (for example the job listing indexes, which
+``create_all`` never added to an existing ``jobs`` table). Their legacy
+``metrics`` table, superseded by ``metric_points``, is copied over by 0002.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Hash partitions per metric table on PostgreSQL (models.job.METRIC_PARTITIONS)
+METRIC_PARTITIONS = 16
+
+def existing_schema():
+    """``{table: index names}`` already in the database (nothing for --sql output)."""
+    if context.is_offline_mode():
+        return {}
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table: {index["name"] for index in inspector.get_indexes(table)}
+        for table in inspector.get_table_names()
+    }
+
+def create_table(schema: dict, name: str, *columns, **kw) -> bool:
+    """Create ``name`` unless it exists; returns whether it was created."""
+    if name in schema:
+        return False
+    op.create_table(name, *columns, **kw)
+    schema[name] = set()
+    return True
+
+def create_index(schema: dict, name: str, table: str, columns: list):
+    if name not in schema[table]:
+        op.create_index(name, table, columns)
+
+def create_hash_partitions(table: str):
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for remainder in range(METRIC_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {METRIC_PARTITIONS}, REMAINDER {remainder})"
+        )
+
+def upgrade():
+    schema = existing_schema()
+
+    create_table(
+        schema,
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+
+    create_table(
+        schema,
+        "jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("config", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("output_path", sa.Text(), nullable=True),
+        sa.Column("metrics", sa.JSON(), nullable=True),
+        sa.Column("gpu_count", sa.Integer(), nullable=True),
+        sa.Column("memory_gb", sa.Integer(), nullable=True),
+    )
+    create_index(schema, "ix_jobs_user_created", "jobs", ["user_id", "created_at", "id"])
+    create_index(schema, "ix_jobs_user_status_created", "jobs", ["user_id", "status", "created_at", "id"])
+
+    create_table(
+        schema,
+        "metric_names",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+    )
+
+    if create_table(
+        schema,
+        "metric_points",
+        sa.Column("job_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("jobs.id"), primary_key=True),
+        sa.Column("name_id", sa.Integer(), sa.ForeignKey("metric_names.id"), primary_key=True),
+        sa.Column("step", sa.Integer(), primary_key=True),
+        sa.Column("metric_value", sa.Float(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        postgresql_partition_by="HASH (job_id)",
+    ):
+        create_hash_partitions("metric_points")
+
+    if create_table(
+        schema,
+        "metric_rollups",
+        sa.Column("job_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("jobs.id"), primary_key=True),
+        sa.Column("name_id", sa.Integer(), sa.ForeignKey("metric_names.id"), primary_key=True),
+        sa.Column("resolution", sa.Integer(), primary_key=True),
+        sa.Column("bucket", sa.Integer(), primary_key=True),
+        sa.Column("min_value", sa.Float(), nullable=False),
+        sa.Column("max_value", sa.Float(), nullable=False),
+        sa.Column("sum_value", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("last_step", sa.Integer(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=False),
+        postgresql_partition_by="HASH (job_id)",
+    ):
+        create_hash_partitions("metric_rollups")
+
+    create_table(
+        schema,
+        "artifacts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("job_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("jobs.id"), nullable=False),
+        sa.Column("artifact_type", sa.String(50), nullable=False),
+        sa.Column("file_path", sa.Text(), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    create_index(schema, "ix_artifacts_job", "artifacts", ["job_id"])
+
+    create_table(
+        schema,
+        "experiments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("base_config", sa.JSON(), nullable=False),
+        sa.Column("search_space", sa.JSON(), nullable=False),
+        sa.Column("algorithm", sa.String(20), nullable=False),
+        sa.Column("objective_metric", sa.String(100), nullable=False),
+        sa.Column("objective_mode", sa.String(3), nullable=False),
+        sa.Column("pruner", sa.JSON(), nullable=False),
+        sa.Column("max_trials", sa.Integer(), nullable=False),
+        sa.Column("max_concurrency", sa.Integer(), nullable=False),
+        sa.Column("gpu_count", sa.Integer(), nullable=True),
+        sa.Column("memory_gb", sa.Integer(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("best_job_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("best_value", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+    create_index(schema, "ix_experiments_user_created", "experiments", ["user_id", "created_at"])
+
+    create_table(
+        schema,
+        "experiment_trials",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("experiment_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("experiments.id"), nullable=False),
+        sa.Column("job_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("jobs.id"), nullable=False, unique=True),
+        sa.Column("trial_index", sa.Integer(), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("objective", sa.Float(), nullable=True),
+        sa.Column("rung_values", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    create_index(schema, "ix_experiment_trials_experiment_id", "experiment_trials", ["experiment_id"])
+
+def downgrade():
+    # Dropping a partitioned table drops its partitions
+    op.drop_table("experiment_trials")
+    op.drop_table("experiments")
+    op.drop_table("artifacts")
+    op.drop_table("metric_rollups")
+    op.drop_table("metric_points")
+    op.drop_table("metric_names")
+    op.drop_table("jobs")
+    op.drop_table("users")
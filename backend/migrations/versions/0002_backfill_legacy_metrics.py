@@ -0,0 +1,79 @@
+"""Copy the legacy metrics table into metric_points and rebuild rollups
+
+Databases adopted from ``create_all`` keep their metric history in the
+old ``metrics`` table. Its names are interned, the last row logged for
+each (job, metric, step) is copied into ``metric_points`` (points already
+stored there win), and the rollups of every job with legacy rows are
+rebuilt from all its points. Rows without a step cannot be keyed and are
+skipped. The legacy table itself is left in place.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Steps per rollup bucket (models.job.ROLLUP_RESOLUTIONS)
+ROLLUP_RESOLUTIONS = (10, 100, 1000, 10000)
+
+LEGACY_JOBS = "SELECT DISTINCT job_id FROM metrics"
+
+def bucket_of(resolution: int) -> str:
+    """Floor division of ``step``, matching ``step // resolution`` for negative steps too."""
+    return f"(step - CASE WHEN step < 0 THEN {resolution - 1} ELSE 0 END) / {resolution}"
+
+def upgrade():
+    # Needs to look at the database; --sql output has nothing to copy
+    if context.is_offline_mode():
+        return
+    if "metrics" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.execute(
+        "INSERT INTO metric_names (name) "
+        "SELECT DISTINCT metric_name FROM metrics "
+        "WHERE metric_name NOT IN (SELECT name FROM metric_names)"
+    )
+
+    op.execute(
+        "INSERT INTO metric_points (job_id, name_id, step, metric_value, timestamp) "
+        "SELECT m.job_id, n.id, m.step, m.metric_value, m.timestamp "
+        "FROM metrics m JOIN metric_names n ON n.name = m.metric_name "
+        "WHERE m.step IS NOT NULL "
+        "AND m.id = ("
+        "    SELECT max(l.id) FROM metrics l "
+        "    WHERE l.job_id = m.job_id AND l.metric_name = m.metric_name AND l.step = m.step"
+        ") "
+        "AND NOT EXISTS ("
+        "    SELECT 1 FROM metric_points p "
+        "    WHERE p.job_id = m.job_id AND p.name_id = n.id AND p.step = m.step"
+        ")"
+    )
+
+    op.execute(f"DELETE FROM metric_rollups WHERE job_id IN ({LEGACY_JOBS})")
+    for resolution in ROLLUP_RESOLUTIONS:
+        op.execute(
+            "INSERT INTO metric_rollups "
+            '(job_id, name_id, resolution, bucket, min_value, max_value, sum_value, "count", last_step, last_value) '
+            f"SELECT b.job_id, b.name_id, {resolution}, b.bucket, "
+            "b.min_value, b.max_value, b.sum_value, b.points, b.last_step, p.metric_value "
+            "FROM ("
+            f"    SELECT job_id, name_id, {bucket_of(resolution)} AS bucket, "
+            "    min(metric_value) AS min_value, max(metric_value) AS max_value, "
+            "    sum(metric_value) AS sum_value, count(*) AS points, max(step) AS last_step "
+            f"    FROM metric_points WHERE job_id IN ({LEGACY_JOBS}) "
+            f"    GROUP BY job_id, name_id, {bucket_of(resolution)}"
+            ") b "
+            "JOIN metric_points p "
+            "ON p.job_id = b.job_id AND p.name_id = b.name_id AND p.step = b.last_step"
+        )
+
+def downgrade():
+    # Copied points are indistinguishable from ingested ones; nothing to undo
+    pass
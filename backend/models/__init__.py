@@ -1,6 +1,8 @@
 from backend.database import Base
+from backend.models.user import User
+from backend.models.job import Artifact, Job, MetricName, MetricPoint, MetricRollup
+from backend.models.experiment import Experiment, Trial
 
-# This file makes 'models' a package and exports Base
-# Individual model files will be imported here later
+# Importing the package registers every table on Base.metadata (for migrations)
 
-__all__ = ["Base"]
+__all__ = ["Base", "User", "Job", "MetricName", "MetricPoint", "MetricRollup", "Artifact", "Experiment", "Trial"]
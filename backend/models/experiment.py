@@ -0,0 +1,66 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey, Float, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import uuid
+from datetime import datetime
+
+from backend.database import Base
+
+class Experiment(Base):
+    """A hyperparameter sweep that runs its trials as ordinary jobs."""
+    __tablename__ = "experiments"
+    __table_args__ = (
+        Index("ix_experiments_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    name = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="running")
+
+    # Trial configs are base_config with search_space samples merged in
+    base_config = Column(JSON, nullable=False)
+    search_space = Column(JSON, nullable=False)
+    algorithm = Column(String(20), nullable=False, default="random")
+    objective_metric = Column(String(100), nullable=False)
+    objective_mode = Column(String(3), nullable=False, default="min")
+    pruner = Column(JSON, nullable=False)
+
+    max_trials = Column(Integer, nullable=False)
+    max_concurrency = Column(Integer, nullable=False)
+
+    # Resources and priority of every trial job
+    gpu_count = Column(Integer, default=1)
+    memory_gb = Column(Integer, default=16)
+    priority = Column(Integer, default=0)
+
+    best_job_id = Column(UUID(as_uuid=True), nullable=True)
+    best_value = Column(Float, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    trials = relationship(
+        "Trial",
+        back_populates="experiment",
+        cascade="all, delete-orphan",
+        order_by="Trial.trial_index"
+    )
+
+class Trial(Base):
+    __tablename__ = "experiment_trials"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    experiment_id = Column(UUID(as_uuid=True), ForeignKey("experiments.id"), nullable=False, index=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False, unique=True)
+    trial_index = Column(Integer, nullable=False)
+    params = Column(JSON, nullable=False)
+    # running, completed, pruned or failed
+    status = Column(String(20), nullable=False, default="running")
+    objective = Column(Float, nullable=True)
+    # Objective value at each pruning rung the trial reached, keyed by step
+    rung_values = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    experiment = relationship("Experiment", back_populates="trials")
+    job = relationship("Job")
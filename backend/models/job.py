@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, JSON, Text, ForeignKey, Float
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Text, ForeignKey, Float, Index, event, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -8,6 +8,11 @@ from backend.database import Base
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Job listing: by user (and status), newest first, keyset on (created_at, id)
+        Index("ix_jobs_user_created", "user_id", "created_at", "id"),
+        Index("ix_jobs_user_status_created", "user_id", "status", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -29,23 +34,70 @@ class Job(Base):
     
     # Relationships
     user = relationship("User", back_populates="jobs")
-    metrics_history = relationship("Metric", back_populates="job", cascade="all, delete-orphan")
+    metrics_history = relationship("MetricPoint", back_populates="job", cascade="all, delete-orphan")
+    metric_rollups = relationship("MetricRollup", cascade="all, delete-orphan")
     artifacts = relationship("Artifact", back_populates="job", cascade="all, delete-orphan")
 
-class Metric(Base):
-    __tablename__ = "metrics"
+# Hash partitions per metric table on PostgreSQL
+METRIC_PARTITIONS = 16
+
+# Steps per rollup bucket, maintained on ingest
+ROLLUP_RESOLUTIONS = (10, 100, 1000, 10000)
+
+class MetricName(Base):
+    """Dictionary of metric names; points refer to them by id."""
+    __tablename__ = "metric_names"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
-    step = Column(Integer)
-    metric_name = Column(String(100), nullable=False)
+    name = Column(String(100), unique=True, nullable=False)
+
+class MetricPoint(Base):
+    """One value per (job, metric, step); the primary key is the access path."""
+    __tablename__ = "metric_points"
+    __table_args__ = {"postgresql_partition_by": "HASH (job_id)"}
+    
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), primary_key=True)
+    name_id = Column(Integer, ForeignKey("metric_names.id"), primary_key=True)
+    step = Column(Integer, primary_key=True)
     metric_value = Column(Float, nullable=False)
+    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
     
     job = relationship("Job", back_populates="metrics_history")
+    name = relationship("MetricName")
+
+class MetricRollup(Base):
+    """Per-bucket aggregates of a series at one resolution (steps per bucket)."""
+    __tablename__ = "metric_rollups"
+    __table_args__ = {"postgresql_partition_by": "HASH (job_id)"}
+    
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), primary_key=True)
+    name_id = Column(Integer, ForeignKey("metric_names.id"), primary_key=True)
+    resolution = Column(Integer, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
+    last_step = Column(Integer, nullable=False)
+    last_value = Column(Float, nullable=False)
+
+def _create_hash_partitions(table, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    for remainder in range(METRIC_PARTITIONS):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table.name}_p{remainder} PARTITION OF {table.name} "
+            f"FOR VALUES WITH (MODULUS {METRIC_PARTITIONS}, REMAINDER {remainder})"
+        ))
+
+event.listen(MetricPoint.__table__, "after_create", _create_hash_partitions)
+event.listen(MetricRollup.__table__, "after_create", _create_hash_partitions)
 
 class Artifact(Base):
     __tablename__ = "artifacts"
+    __table_args__ = (
+        Index("ix_artifacts_job", "job_id"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
     artifact_type = Column(String(50), nullable=False)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+import uuid
+
+class ArtifactCreate(BaseModel):
+    artifact_type: str = Field(..., min_length=1, max_length=50)
+    file_path: str = Field(..., min_length=1)
+    file_size: Optional[int] = Field(default=None, ge=0)
+
+class ArtifactResponse(BaseModel):
+    id: uuid.UUID
+    job_id: uuid.UUID
+    artifact_type: str
+    file_path: str
+    file_size: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,111 @@
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Optional, Dict, Any, List, Literal
+from datetime import datetime
+import random
+import uuid
+
+from backend.schemas.job import JobConfig
+from backend.core.search_space import grid_point, grid_size, merge_params, sample_random
+
+class ParameterSpec(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["choice", "uniform", "loguniform", "int"]
+    values: Optional[List[Any]] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.type == "choice":
+            if not self.values:
+                raise ValueError("choice parameters need a non-empty 'values' list")
+            return self
+        if self.low is None or self.high is None or self.low > self.high:
+            raise ValueError(f"{self.type} parameters need low <= high")
+        if self.type == "loguniform" and self.low <= 0:
+            raise ValueError("loguniform parameters need low > 0")
+        return self
+
+class PrunerConfig(BaseModel):
+    """Early stopping of weak trials on the objective metric.
+
+    ``asha`` checks trials at steps ``min_steps * eta**k`` and stops those
+    outside the top ``1/eta`` at that rung. ``median`` checks every
+    ``interval`` steps after ``min_steps`` and stops trials worse than the
+    median of the other trials at the same step.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["asha", "median", "none"] = "asha"
+    min_steps: int = Field(default=100, ge=1)
+    eta: int = Field(default=3, ge=2)
+    interval: int = Field(default=100, ge=1)
+    min_trials: int = Field(default=3, ge=1)
+
+class ExperimentCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    base_config: Dict[str, Any]
+    search_space: Dict[str, ParameterSpec] = Field(..., min_length=1)
+    algorithm: Literal["grid", "random", "bayesian"] = "random"
+    objective_metric: str = Field(default="epoch_loss", min_length=1, max_length=100)
+    objective_mode: Literal["min", "max"] = "min"
+    pruner: PrunerConfig = Field(default_factory=PrunerConfig)
+    max_trials: int = Field(default=20, ge=1, le=1000)
+    max_concurrency: int = Field(default=4, ge=1, le=100)
+    gpu_count: int = Field(default=1, ge=0, le=8)
+    memory_gb: int = Field(default=16, ge=8, le=128)
+    priority: int = Field(default=0, ge=0, le=10)
+
+    @model_validator(mode="after")
+    def check_trial_configs(self):
+        """Reject spaces whose trials could not pass JobConfig validation."""
+        space = {key: spec.model_dump() for key, spec in self.search_space.items()}
+        if self.algorithm == "grid":
+            if any(spec["type"] != "choice" for spec in space.values()):
+                raise ValueError("grid search only supports choice parameters")
+            samples = [grid_point(space, 0), grid_point(space, grid_size(space) - 1)]
+        else:
+            rng = random.Random(0)
+            samples = [sample_random(space, rng) for _ in range(3)]
+
+        for params in samples:
+            JobConfig.model_validate(merge_params(self.base_config, params))
+        return self
+
+class TrialResponse(BaseModel):
+    id: uuid.UUID
+    job_id: uuid.UUID
+    trial_index: int
+    params: Dict[str, Any]
+    status: str
+    objective: Optional[float] = None
+    rung_values: Dict[str, float]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ExperimentResponse(BaseModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    name: str
+    status: str
+    algorithm: str
+    objective_metric: str
+    objective_mode: str
+    max_trials: int
+    max_concurrency: int
+    best_job_id: Optional[uuid.UUID] = None
+    best_value: Optional[float] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ExperimentDetail(ExperimentResponse):
+    base_config: Dict[str, Any]
+    search_space: Dict[str, Any]
+    pruner: Dict[str, Any]
+    trials: List[TrialResponse]
@@ -1,31 +1,122 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 import uuid
 
+# Names are substituted into generated Python source and used as cache
+# paths, so keep them plain: a name with at most one namespace prefix
+# ("org/name"), where no segment starts with a dot ("..", ".hidden")
+NAME_SEGMENT = r"[A-Za-z0-9_\-][A-Za-z0-9_.\-]*"
+NAME_PATTERN = rf"^{NAME_SEGMENT}(/{NAME_SEGMENT})?$"
+
+class PerformanceProfile(BaseModel):
+    """Input pipeline and CPU settings; unset fields are tuned from the job's allocation."""
+    model_config = ConfigDict(extra="forbid")
+
+    num_workers: Optional[int] = Field(default=None, ge=0, le=64)
+    num_threads: Optional[int] = Field(default=None, ge=1, le=256)
+    pin_memory: Optional[bool] = None
+    persistent_workers: Optional[bool] = None
+    prefetch_factor: Optional[int] = Field(default=None, ge=1, le=16)
+    channels_last: bool = False
+    bf16: bool = False
+    compile: bool = False
+
+class CheckpointPolicy(BaseModel):
+    """When checkpoints are written and how many are kept."""
+    model_config = ConfigDict(extra="forbid")
+
+    # Also checkpoint every N optimizer steps, not only at epoch ends
+    every_steps: Optional[int] = Field(default=None, ge=1)
+    keep_last: int = Field(default=3, ge=1)
+    keep_best: int = Field(default=1, ge=0)
+
+class DistributedConfig(BaseModel):
+    """Data-parallel ranks; GPU jobs default to one rank per allocated GPU."""
+    model_config = ConfigDict(extra="forbid")
+
+    # Ranks to launch; on CPU-only workers each rank gets a share of the cores
+    processes: Optional[int] = Field(default=None, ge=1, le=64)
+    # nccl on GPUs, gloo otherwise
+    backend: Optional[Literal["nccl", "gloo"]] = None
+
+class ProfilingConfig(BaseModel):
+    """Opt-in step timing reported as job metrics, plus an optional torch.profiler trace."""
+    model_config = ConfigDict(extra="forbid")
+
+    # Steps per reported window
+    interval: int = Field(default=50, ge=1)
+    # Synchronize CUDA at phase boundaries so GPU time lands in the right phase
+    sync_cuda: bool = True
+    # Capture a trace of trace_steps steps after skipping trace_wait + trace_warmup
+    trace: bool = False
+    trace_wait: int = Field(default=10, ge=0)
+    trace_warmup: int = Field(default=2, ge=0)
+    trace_steps: int = Field(default=5, ge=1, le=100)
+
 class JobConfig(BaseModel):
-    model: str
-    dataset: str
-    epochs: int
-    batch_size: int
-    learning_rate: float
-    optimizer: str = "adam"
-    # Add more fields as needed
+    """Training config; every key a worker template can use must be declared here."""
+    model_config = ConfigDict(extra="forbid", protected_namespaces=())
+
+    # Selects the worker template: <framework>[_<model_family>]_template.py
+    framework: Literal["pytorch"] = "pytorch"
+    model_family: Optional[str] = Field(default=None, pattern=r"^[a-z0-9_]+$")
+
+    model: str = Field(..., pattern=NAME_PATTERN)
+    dataset: str = Field(..., pattern=NAME_PATTERN)
+    epochs: int = Field(..., ge=1)
+    batch_size: int = Field(..., ge=1)
+    learning_rate: float = Field(..., gt=0)
+    optimizer: Literal["adam", "sgd"] = "adam"
+    # Start from the model's default torchvision weights
+    pretrained: bool = False
+    performance: Optional[PerformanceProfile] = None
+    checkpoint: Optional[CheckpointPolicy] = None
+    distributed: Optional[DistributedConfig] = None
+    profiling: Optional[ProfilingConfig] = None
 
 class JobCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     config: Dict[str, Any]
-    gpu_count: int = Field(default=1, ge=1, le=8)
+    # 0 requests a CPU-only worker
+    gpu_count: int = Field(default=1, ge=0, le=8)
     memory_gb: int = Field(default=16, ge=8, le=128)
     priority: int = Field(default=0, ge=0, le=10)
 
+    @field_validator("config")
+    @classmethod
+    def validate_config(cls, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Reject unknown or missing keys at submit time and fill in defaults."""
+        return JobConfig.model_validate(config).model_dump()
+
+    @model_validator(mode="after")
+    def check_ranks_fit_gpus(self) -> "JobCreate":
+        """GPU ranks each need their own device."""
+        processes = (self.config.get("distributed") or {}).get("processes")
+        if self.gpu_count > 0 and processes and processes > self.gpu_count:
+            raise ValueError(
+                f"distributed.processes ({processes}) exceeds gpu_count ({self.gpu_count})"
+            )
+        return self
+
+# Jobs per bulk request; one INSERT and one Redis round trip each
+MAX_BULK_JOBS = 1000
+
+class JobBulkCreate(BaseModel):
+    jobs: List[JobCreate] = Field(..., min_length=1, max_length=MAX_BULK_JOBS)
+
 class JobUpdate(BaseModel):
     name: Optional[str] = None
     status: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     output_path: Optional[str] = None
     metrics: Optional[Dict[str, Any]] = None
 
+class JobBulkUpdateItem(JobUpdate):
+    id: uuid.UUID
+
 class JobResponse(BaseModel):
     id: uuid.UUID
     user_id: uuid.UUID
@@ -43,3 +134,10 @@ class JobResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class JobStatusResponse(BaseModel):
+    id: uuid.UUID
+    status: str
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error_message: Optional[str] = None
@@ -6,3 +6,7 @@ class MetricCreate(BaseModel):
     metric_name: str
     metric_value: float
     timestamp: datetime
+
+class MetricBatchResponse(BaseModel):
+    job_id: str
+    inserted: int
@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import uuid
+
+from backend.models.job import Artifact
+from backend.schemas.artifact import ArtifactCreate
+
+class ArtifactService:
+    def create_artifact(self, db: Session, job_id: uuid.UUID, artifact_data: ArtifactCreate) -> Artifact:
+        """Register a file produced by a job; re-registering a path updates it."""
+        artifact = (
+            db.query(Artifact)
+            .filter(Artifact.job_id == job_id, Artifact.file_path == artifact_data.file_path)
+            .first()
+        )
+        if artifact is None:
+            artifact = Artifact(job_id=job_id, file_path=artifact_data.file_path)
+            db.add(artifact)
+        artifact.artifact_type = artifact_data.artifact_type
+        artifact.file_size = artifact_data.file_size
+        db.commit()
+        db.refresh(artifact)
+        return artifact
+    
+    def get_job_artifacts(
+        self,
+        db: Session,
+        job_id: uuid.UUID,
+        artifact_type: Optional[str] = None
+    ) -> List[Artifact]:
+        query = db.query(Artifact).filter(Artifact.job_id == job_id)
+        if artifact_type:
+            query = query.filter(Artifact.artifact_type == artifact_type)
+        return query.order_by(Artifact.created_at).all()
+    
+    def delete_artifact(self, db: Session, job_id: uuid.UUID, file_path: str) -> bool:
+        """Forget a file the job has deleted (e.g. a pruned checkpoint)."""
+        deleted = (
+            db.query(Artifact)
+            .filter(Artifact.job_id == job_id, Artifact.file_path == file_path)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return bool(deleted)
+
+artifact_service = ArtifactService()
@@ -0,0 +1,45 @@
+from typing import List, Sequence, Tuple
+
+def lttb(steps: Sequence[int], values: Sequence[float], threshold: int) -> Tuple[List[int], List[float]]:
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, for every bucket in between, the
+    point that forms the largest triangle with its neighbours, so peaks and
+    troughs survive the reduction. Runs in a single O(n) pass.
+    """
+    n = len(steps)
+    if threshold >= n or threshold < 3:
+        return list(steps), list(values)
+
+    out_steps = [steps[0]]
+    out_values = [values[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(steps[next_start:next_end]) / span
+        avg_y = sum(values[next_start:next_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = steps[a], values[a]
+
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (values[j] - ay) - (ax - steps[j]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        out_steps.append(steps[best])
+        out_values.append(values[best])
+        a = best
+
+    out_steps.append(steps[-1])
+    out_values.append(values[-1])
+    return out_steps, out_values
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+from functools import cached_property
+from typing import AsyncIterator, Dict, List, Optional, Set
+import uuid
+
+import redis
+
+from backend.core.clients import get_async_redis, get_redis
+from backend.schemas.metric import MetricCreate
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+def event_channel(job_id) -> str:
+    return f"job_events:{job_id}"
+
+def status_event(job) -> dict:
+    return {
+        "type": "status",
+        "job_id": str(job.id),
+        "status": job.status,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "error_message": job.error_message,
+    }
+
+def metrics_event(job_id: uuid.UUID, metrics: List[MetricCreate]) -> dict:
+    return {
+        "type": "metrics",
+        "job_id": str(job_id),
+        "points": [
+            {"step": m.step, "metric_name": m.metric_name, "metric_value": m.metric_value}
+            for m in metrics
+        ],
+    }
+
+class EventBroker:
+    """Fans one Redis pub/sub connection per process out to local subscribers.
+
+    A channel is subscribed on Redis only while at least one client in
+    this process follows that job, so Redis load grows with events, not
+    with connected clients.
+    """
+
+    def __init__(self, redis_client, queue_size: int = 1000):
+        self.redis = redis_client
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader = None
+        self.dropped = 0
+
+    async def subscribe(self, job_id: uuid.UUID) -> asyncio.Queue:
+        channel = event_channel(job_id)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        if self._pubsub is None:
+            self._pubsub = self.redis.pubsub()
+        subscribers = self._subscribers.setdefault(channel, set())
+        if not subscribers:
+            await self._pubsub.subscribe(channel)
+        subscribers.add(queue)
+
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, job_id: uuid.UUID, queue: asyncio.Queue):
+        channel = event_channel(job_id)
+        subscribers = self._subscribers.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[channel]
+            await self._pubsub.unsubscribe(channel)
+
+    async def _read(self):
+        while self._subscribers:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except redis.RedisError as e:
+                logger.error(f"Job event subscription failed: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+
+            for queue in list(self._subscribers.get(message["channel"], ())):
+                try:
+                    queue.put_nowait(message["data"])
+                except asyncio.QueueFull:
+                    # Slow client; it can resume from its last step
+                    self.dropped += 1
+
+class EventService:
+    @cached_property
+    def redis_client(self):
+        return get_redis()
+
+    @cached_property
+    def async_redis(self):
+        return get_async_redis()
+
+    @cached_property
+    def broker(self) -> EventBroker:
+        return EventBroker(self.async_redis)
+
+    def publish_status(self, job):
+        """Publish a status transition (fire and forget)."""
+        try:
+            self.redis_client.publish(event_channel(job.id), json.dumps(status_event(job)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish status of job {job.id}: {str(e)}")
+
+    async def apublish_status(self, job):
+        try:
+            await self.async_redis.publish(event_channel(job.id), json.dumps(status_event(job)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish status of job {job.id}: {str(e)}")
+
+    def publish_metrics(self, job_id: uuid.UUID, metrics: List[MetricCreate]):
+        try:
+            self.redis_client.publish(event_channel(job_id), json.dumps(metrics_event(job_id, metrics)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish metrics of job {job_id}: {str(e)}")
+
+    async def apublish_metrics(self, job_id: uuid.UUID, metrics: List[MetricCreate]):
+        try:
+            await self.async_redis.publish(event_channel(job_id), json.dumps(metrics_event(job_id, metrics)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish metrics of job {job_id}: {str(e)}")
+
+    async def job_events(
+        self,
+        job_id: uuid.UUID,
+        snapshot,
+        replay,
+        since_step: Optional[int] = None,
+        keepalive_seconds: float = 15.0
+    ) -> AsyncIterator[str]:
+        """Server-sent events for a job: status transitions and new metric points.
+
+        ``snapshot()`` returns the current status event and ``replay(since_step)``
+        iterates over ``(points, complete_step)`` pages of the metric points
+        already stored after ``since_step``. Both run after subscribing so
+        nothing is missed in between; live points at or before an already-sent
+        step are skipped. A page's SSE id is its ``complete_step``, so a
+        reconnect never skips the rest of a step. The stream ends after a
+        terminal status.
+        """
+        queue = await self.broker.subscribe(job_id)
+        try:
+            current_status = await snapshot()
+            yield _sse(current_status)
+
+            floor = since_step if since_step is not None else -1
+            last_step = {}
+            if since_step is not None:
+                async for points, complete_step in replay(since_step):
+                    for point in points:
+                        last_step[point["metric_name"]] = point["step"]
+                    yield _sse({"type": "metrics", "job_id": str(job_id), "points": points}, complete_step)
+
+            if current_status["status"] in TERMINAL_STATUSES:
+                return
+
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                event = json.loads(data)
+                if event["type"] == "metrics":
+                    event["points"] = [
+                        p for p in event["points"]
+                        if p["step"] is None or p["step"] > last_step.get(p["metric_name"], floor)
+                    ]
+                    if not event["points"]:
+                        continue
+                    steps = [p["step"] for p in event["points"] if p["step"] is not None]
+                    for p in event["points"]:
+                        if p["step"] is not None:
+                            last_step[p["metric_name"]] = p["step"]
+                    yield _sse(event, max(steps) if steps else None)
+                    continue
+
+                yield _sse(event)
+
+                if event["type"] == "status" and event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            await self.broker.unsubscribe(job_id, queue)
+
+def _sse(event: dict, event_id: Optional[int] = None) -> str:
+    """Format an event; metric events carry their last step as the SSE id."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+event_service = EventService()
@@ -0,0 +1,324 @@
+"""Hyperparameter sweeps run as ordinary queued jobs.
+
+``advance`` is the only place trials are started: it syncs trial statuses
+from their jobs, records objectives, and launches new trials until
+``max_concurrency`` are running or ``max_trials`` exist. It runs when an
+experiment is created and whenever one of its trial jobs finishes.
+
+Pruning is driven by metric ingest: ``on_metrics`` records the objective
+at each rung a trial passes and cancels trials that fall behind.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import random
+import statistics
+import threading
+from typing import List, Optional
+import uuid
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.core.search_space import merge_params
+from backend.database import SessionLocal
+from backend.models.experiment import Experiment, Trial
+from backend.models.job import Job, MetricName, MetricPoint
+from backend.schemas.experiment import ExperimentCreate
+from backend.schemas.job import JobCreate
+from backend.services.event_service import TERMINAL_STATUSES
+from backend.services.job_service import job_service
+from backend.services.search import suggest
+
+logger = logging.getLogger(__name__)
+
+# Rungs recorded per metric batch; older skipped rungs are not backfilled
+MAX_RUNGS_PER_UPDATE = 10
+
+# Job ids remembered as not belonging to any experiment
+NON_TRIAL_CACHE_SIZE = 10000
+
+def rung_steps(pruner: dict, max_step: int) -> List[int]:
+    """Pruning rungs up to ``max_step``, ascending."""
+    kind = pruner.get("type", "none")
+    min_steps = pruner.get("min_steps", 100)
+    rungs = []
+    if kind == "asha":
+        step = min_steps
+        while step <= max_step:
+            rungs.append(step)
+            step *= pruner.get("eta", 3)
+    elif kind == "median":
+        interval = pruner.get("interval", 100)
+        if max_step >= min_steps:
+            last = min_steps + (max_step - min_steps) // interval * interval
+            first = max(min_steps, last - (MAX_RUNGS_PER_UPDATE - 1) * interval)
+            rungs = list(range(first, last + 1, interval))
+    return rungs[-MAX_RUNGS_PER_UPDATE:]
+
+def is_better(value: float, other: float, mode: str) -> bool:
+    return value > other if mode == "max" else value < other
+
+def should_prune(pruner: dict, mode: str, value: float, others: List[float]) -> bool:
+    """Whether a trial with ``value`` at a rung loses to the ``others`` there."""
+    if pruner["type"] == "asha":
+        # Keep the top 1/eta of the trials that reached the rung
+        ranked = sorted(others + [value], reverse=(mode == "max"))
+        keep = len(ranked) // pruner.get("eta", 3)
+        return keep > 0 and is_better(ranked[keep - 1], value, mode)
+    if pruner["type"] == "median":
+        if len(others) < pruner.get("min_trials", 3):
+            return False
+        return is_better(statistics.median(others), value, mode)
+    return False
+
+class ExperimentService:
+    def __init__(self):
+        self._non_trials = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create_experiment(self, db: Session, data: ExperimentCreate, user_id: uuid.UUID) -> Experiment:
+        """Store the experiment and launch its first trials."""
+        experiment = Experiment(
+            user_id=user_id,
+            name=data.name,
+            base_config=data.base_config,
+            search_space={key: spec.model_dump(exclude_none=True) for key, spec in data.search_space.items()},
+            algorithm=data.algorithm,
+            objective_metric=data.objective_metric,
+            objective_mode=data.objective_mode,
+            pruner=data.pruner.model_dump(),
+            max_trials=data.max_trials,
+            max_concurrency=data.max_concurrency,
+            gpu_count=data.gpu_count,
+            memory_gb=data.memory_gb,
+            priority=data.priority
+        )
+        db.add(experiment)
+        db.commit()
+        return self.advance(db, experiment.id)
+
+    def get_experiment(self, db: Session, experiment_id: uuid.UUID) -> Optional[Experiment]:
+        return db.get(Experiment, experiment_id)
+
+    def get_user_experiments(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Experiment]:
+        query = (
+            select(Experiment)
+            .where(Experiment.user_id == user_id)
+            .order_by(Experiment.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(db.scalars(query).all())
+
+    def advance(self, db: Session, experiment_id: uuid.UUID) -> Optional[Experiment]:
+        """Sync finished trials, launch new ones and complete the experiment when done."""
+        experiment = db.scalars(
+            select(Experiment).where(Experiment.id == experiment_id).with_for_update()
+        ).first()
+        if not experiment or experiment.status != "running":
+            db.commit()
+            return experiment
+
+        trials = list(experiment.trials)
+        for trial in trials:
+            if trial.status == "running":
+                self._sync_trial(db, experiment, trial)
+
+        history = [(t.params, t.objective) for t in trials if t.status == "completed" and t.objective is not None]
+        running = sum(1 for t in trials if t.status == "running")
+
+        launched = []
+        exhausted = False
+        while running < experiment.max_concurrency and len(trials) < experiment.max_trials:
+            index = len(trials)
+            rng = random.Random(f"{experiment.id}:{index}")
+            params = suggest(
+                experiment.algorithm,
+                experiment.search_space,
+                index,
+                history,
+                experiment.objective_mode,
+                rng
+            )
+            if params is None:
+                exhausted = True
+                break
+
+            try:
+                job_data = JobCreate(
+                    name=f"{experiment.name} #{index}",
+                    config=merge_params(experiment.base_config, params),
+                    gpu_count=experiment.gpu_count,
+                    memory_gb=experiment.memory_gb,
+                    priority=experiment.priority
+                )
+            except ValidationError as e:
+                logger.error(f"Experiment {experiment.id} suggested an invalid config {params}: {e}")
+                # Nothing from this pass is kept; running trials are cancelled
+                db.rollback()
+                return self._stop(db, experiment_id, "failed")
+            job = job_service.build_job(job_data, experiment.user_id)
+            db.add(job)
+            db.flush()
+            trial = Trial(experiment_id=experiment.id, job_id=job.id, trial_index=index, params=params, rung_values={})
+            db.add(trial)
+            trials.append(trial)
+            launched.append(job)
+            running += 1
+
+        self._record_best(experiment, trials)
+
+        if experiment.status == "running" and running == 0 and (exhausted or len(trials) >= experiment.max_trials):
+            experiment.status = "completed"
+            experiment.completed_at = datetime.utcnow()
+
+        db.commit()
+
+        for job in launched:
+            job_service.enqueue_job(db, job.id)
+
+        db.refresh(experiment)
+        return experiment
+
+    def cancel_experiment(self, db: Session, experiment_id: uuid.UUID) -> bool:
+        """Stop launching trials and cancel the running ones."""
+        return self._stop(db, experiment_id, "cancelled") is not None
+
+    def _stop(self, db: Session, experiment_id: uuid.UUID, status: str) -> Optional[Experiment]:
+        experiment = db.scalars(
+            select(Experiment).where(Experiment.id == experiment_id).with_for_update()
+        ).first()
+        if not experiment:
+            db.commit()
+            return None
+
+        for trial in experiment.trials:
+            if trial.status == "running":
+                self._sync_trial(db, experiment, trial)
+        running = [t for t in experiment.trials if t.status == "running"]
+        for trial in running:
+            trial.status = "failed"
+        self._record_best(experiment, experiment.trials)
+        experiment.status = status
+        experiment.completed_at = datetime.utcnow()
+        db.commit()
+
+        for trial in running:
+            job_service.cancel_job(db, trial.job_id)
+        db.refresh(experiment)
+        return experiment
+
+    def on_job_finished(self, job_id: uuid.UUID):
+        """Background hook for terminal job statuses; advances the job's experiment."""
+        if self._known_non_trial(job_id):
+            return
+        with SessionLocal() as db:
+            experiment_id = db.scalar(select(Trial.experiment_id).where(Trial.job_id == job_id))
+            if experiment_id is None:
+                self._remember_non_trial(job_id)
+                return
+            self.advance(db, experiment_id)
+
+    def on_metrics(self, job_id: uuid.UUID, max_step: int):
+        """Background hook for metric ingest; records rung values and prunes."""
+        if self._known_non_trial(job_id):
+            return
+        with SessionLocal() as db:
+            trial = db.scalars(select(Trial).where(Trial.job_id == job_id).with_for_update()).first()
+            if trial is None:
+                self._remember_non_trial(job_id)
+                return
+
+            experiment = trial.experiment
+            pruner = experiment.pruner
+            if trial.status != "running" or experiment.status != "running" or pruner.get("type", "none") == "none":
+                db.commit()
+                return
+
+            rungs = [r for r in rung_steps(pruner, max_step) if str(r) not in trial.rung_values]
+            if not rungs:
+                db.commit()
+                return
+
+            name_id = db.scalar(select(MetricName.id).where(MetricName.name == experiment.objective_metric))
+            if name_id is None:
+                db.commit()
+                return
+
+            rung_values = dict(trial.rung_values)
+            prune_at = None
+            for rung in rungs:
+                value = self._value_at(db, job_id, name_id, rung)
+                if value is None:
+                    continue
+                rung_values[str(rung)] = value
+                others = [
+                    t.rung_values[str(rung)]
+                    for t in experiment.trials
+                    if t.id != trial.id and str(rung) in t.rung_values
+                ]
+                if prune_at is None and should_prune(pruner, experiment.objective_mode, value, others):
+                    prune_at = rung
+
+            trial.rung_values = rung_values
+            if prune_at is not None:
+                trial.status = "pruned"
+            db.commit()
+
+            if prune_at is not None:
+                logger.info(f"Pruning trial {trial.trial_index} of experiment {experiment.id} at step {prune_at}")
+                job_service.cancel_job(db, job_id)
+                self.advance(db, experiment.id)
+
+    def _record_best(self, experiment: Experiment, trials: List[Trial]):
+        finished = [t for t in trials if t.status == "completed" and t.objective is not None]
+        if finished:
+            pick = max if experiment.objective_mode == "max" else min
+            best = pick(finished, key=lambda t: t.objective)
+            experiment.best_job_id = best.job_id
+            experiment.best_value = best.objective
+
+    def _sync_trial(self, db: Session, experiment: Experiment, trial: Trial):
+        status = db.scalar(select(Job.status).where(Job.id == trial.job_id))
+        if status not in TERMINAL_STATUSES:
+            return
+        if status != "completed":
+            trial.status = "failed"
+            return
+        trial.status = "completed"
+        name_id = db.scalar(select(MetricName.id).where(MetricName.name == experiment.objective_metric))
+        if name_id is not None:
+            trial.objective = self._value_at(db, trial.job_id, name_id)
+
+    def _value_at(self, db: Session, job_id: uuid.UUID, name_id: int, step: Optional[int] = None) -> Optional[float]:
+        """Latest value of a series at or before ``step`` (a primary key range scan)."""
+        query = select(MetricPoint.metric_value).where(
+            MetricPoint.job_id == job_id,
+            MetricPoint.name_id == name_id
+        )
+        if step is not None:
+            query = query.where(MetricPoint.step <= step)
+        return db.scalar(query.order_by(MetricPoint.step.desc()).limit(1))
+
+    def _known_non_trial(self, job_id: uuid.UUID) -> bool:
+        with self._lock:
+            if job_id in self._non_trials:
+                self._non_trials.move_to_end(job_id)
+                return True
+        return False
+
+    def _remember_non_trial(self, job_id: uuid.UUID):
+        with self._lock:
+            self._non_trials[job_id] = True
+            if len(self._non_trials) > NON_TRIAL_CACHE_SIZE:
+                self._non_trials.popitem(last=False)
+
+experiment_service = ExperimentService()
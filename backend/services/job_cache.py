@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+import uuid
+
+import redis
+
+from backend.schemas.job import JobResponse
+
+# Bump when JobResponse changes shape so old entries are never decoded
+CACHE_SCHEMA_VERSION = 1
+
+# Store only if nobody invalidated the job since the caller read the generation
+# KEYS: entry   ARGV: expected generation, payload, ttl
+_FILL = """
+local gen = redis.call('HGET', KEYS[1], 'gen') or '0'
+if gen ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+class JobCache:
+    """Read-through cache of serialized JobResponse objects.
+
+    Each job has one Redis hash holding the payload and a generation
+    counter. Invalidation bumps the generation and drops the payload, and
+    a fill only succeeds if the generation is unchanged, so a slow reader
+    can never put back data that was read before an update.
+
+    A small per-process LRU with a short TTL sits in front of Redis to
+    absorb tight polling loops.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        ttl_seconds: int = 60,
+        local_ttl_seconds: float = 2.0,
+        local_size: int = 1024
+    ):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self.local_size = local_size
+        self._fill = redis_client.register_script(_FILL)
+
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+
+    def key(self, job_id: uuid.UUID) -> str:
+        return f"job_cache:v{CACHE_SCHEMA_VERSION}:{job_id}"
+
+    def get(self, job_id: uuid.UUID) -> Tuple[Optional[JobResponse], str]:
+        """Return ``(job, generation)``; job is None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(job_id)
+            if entry and entry[0] > now:
+                self._local.move_to_end(job_id)
+                self.stats["local_hits"] += 1
+                return entry[1], entry[2]
+
+        try:
+            data, gen = self.redis.hmget(self.key(job_id), "data", "gen")
+        except redis.RedisError:
+            self.stats["errors"] += 1
+            return None, None
+
+        gen = gen or "0"
+        if data is None:
+            self.stats["misses"] += 1
+            return None, gen
+
+        self.stats["redis_hits"] += 1
+        job = JobResponse.model_validate_json(data)
+        self._remember(job_id, job, gen)
+        return job, gen
+
+    def set(self, job_id: uuid.UUID, job: JobResponse, gen: Optional[str]):
+        """Cache ``job`` if it is still at generation ``gen``."""
+        if gen is None:
+            return
+        try:
+            stored = self._fill(
+                keys=[self.key(job_id)],
+                args=[gen, job.model_dump_json(), self.ttl_seconds]
+            )
+        except redis.RedisError:
+            self.stats["errors"] += 1
+            return
+        if stored:
+            self._remember(job_id, job, gen)
+
+    def invalidate(self, job_id: uuid.UUID):
+        with self._lock:
+            self._local.pop(job_id, None)
+        self.stats["invalidations"] += 1
+
+        key = self.key(job_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hincrby(key, "gen", 1)
+            pipe.hdel(key, "data")
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        except redis.RedisError:
+            self.stats["errors"] += 1
+
+    def _remember(self, job_id: uuid.UUID, job: JobResponse, gen: str):
+        with self._lock:
+            self._local[job_id] = (time.monotonic() + self.local_ttl_seconds, job, gen)
+            self._local.move_to_end(job_id)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
@@ -1,76 +1,162 @@
-import redis
+import asyncio
+import base64
 import json
+from datetime import datetime
+from functools import cached_property
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 
-from backend.models.job import Job
-from backend.schemas.job import JobCreate, JobUpdate
+from backend.core.clients import get_redis
+from backend.core.job_queue import JobQueue
+from backend.core.scheduler import Scheduler
+from backend.models.job import Job, MetricName, MetricPoint
+from backend.schemas.job import JobCreate, JobBulkUpdateItem, JobUpdate, JobResponse
+from backend.services.downsampling import lttb
+from backend.services.event_service import event_service
+from backend.services.job_cache import JobCache
+from backend.services.metric_store import (
+    RAW_SCAN_LIMIT,
+    bucketed_series,
+    finest_resolution,
+    name_labels,
+    raw_series,
+    resolve_name_ids,
+    rollup_series,
+    series_extents,
+)
+
+METRIC_AGGREGATIONS = ("lttb", "minmax", "mean", "none")
+
+def encode_cursor(job: Job) -> str:
+    """Opaque keyset cursor pointing just past ``job`` in newest-first order."""
+    raw = f"{job.created_at.isoformat()}|{job.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on malformed input."""
+    try:
+        created_at, job_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(job_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def user_jobs_query(
+    user_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
+    status_filter: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    """Newest-first job listing; ``cursor`` switches from OFFSET to keyset paging."""
+    query = select(Job).where(Job.user_id == user_id)
+
+    if status_filter:
+        query = query.where(Job.status == status_filter)
+
+    if cursor:
+        query = query.where(tuple_(Job.created_at, Job.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+
+    return query.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit)
+
+def job_values(job_data: JobCreate, user_id: uuid.UUID) -> dict:
+    """Column values of a new queued job."""
+    return {
+        "user_id": user_id,
+        "name": job_data.name,
+        "config": job_data.config,
+        "status": "queued",
+        "priority": job_data.priority,
+        "gpu_count": job_data.gpu_count,
+        "memory_gb": job_data.memory_gb,
+    }
 
 class JobService:
-    def __init__(self):
-        self.redis_client = redis.Redis(
-            host="redis",
-            port=6379,
-            decode_responses=True
-        )
+    """Queue, scheduler and cache are built on first use from the shared Redis client."""
+
+    @cached_property
+    def redis_client(self):
+        return get_redis()
+
+    @cached_property
+    def queue(self) -> JobQueue:
+        return JobQueue(self.redis_client)
+
+    @cached_property
+    def scheduler(self) -> Scheduler:
+        return Scheduler(self.queue)
+
+    @cached_property
+    def cache(self) -> JobCache:
+        return JobCache(self.redis_client)
+    
+    def build_job(self, job_data: JobCreate, user_id: uuid.UUID) -> Job:
+        """Unsaved queued Job for ``job_data``."""
+        return Job(**job_values(job_data, user_id))
     
     def create_job(self, db: Session, job_data: JobCreate, user_id: uuid.UUID) -> Job:
         """Create a new job in database."""
-        job = Job(
-            user_id=user_id,
-            name=job_data.name,
-            config=job_data.config,
-            status="queued",
-            priority=job_data.priority,
-            gpu_count=job_data.gpu_count,
-            memory_gb=job_data.memory_gb
-        )
+        job = self.build_job(job_data, user_id)
         db.add(job)
         db.commit()
         db.refresh(job)
         return job
     
     def enqueue_job(self, db: Session, job_id: uuid.UUID):
-        """Add job to Redis queue for execution."""
-        # Use sorted set for priority queue
-        # Score = (priority * -1000000) + timestamp
-        # This ensures higher priority jobs are processed first
-        import time
+        """Add job to the shared priority queue for execution."""
         job = self.get_job(db, job_id)
-        score = -job.priority * 1000000 + time.time()
-        
-        self.redis_client.zadd(
-            "job_queue",
-            {str(job_id): score}
+        self.queue.enqueue(
+            job_id,
+            job.priority,
+            resources={"gpu_count": job.gpu_count, "memory_gb": job.memory_gb}
         )
 
-    def dequeue_job(self):
-        """Pop highest priority job from queue."""
-        job_id = self.redis_client.zpopmin("job_queue")
-        if job_id:
-            return job_id[0][0]
-        return None
+    def get_jobs_status(self, db: Session, job_ids: List[uuid.UUID], user_id: uuid.UUID) -> List[dict]:
+        """Status of the user's jobs among ``job_ids`` in one query; unknown ids are left out."""
+        query = (
+            select(Job.id, Job.status, Job.started_at, Job.completed_at, Job.error_message)
+            .where(Job.id.in_(job_ids), Job.user_id == user_id)
+        )
+        return [row._asdict() for row in db.execute(query)]
+    
+    def dequeue_job(self, worker_id: str):
+        """Lease the highest priority job to a worker, if any."""
+        return self.queue.claim(worker_id)
     
     def get_job(self, db: Session, job_id: uuid.UUID) -> Optional[Job]:
         """Get job by ID."""
         return db.query(Job).filter(Job.id == job_id).first()
     
+    def get_job_cached(self, db: Session, job_id: uuid.UUID) -> Optional[JobResponse]:
+        """Get job by ID through the read-through cache."""
+        cached, gen = self.cache.get(job_id)
+        if cached:
+            return cached
+        
+        job = self.get_job(db, job_id)
+        if not job:
+            return None
+        
+        response = JobResponse.model_validate(job)
+        self.cache.set(job_id, response, gen)
+        return response
+    
     def get_user_jobs(
         self,
         db: Session,
         user_id: uuid.UUID,
         skip: int = 0,
         limit: int = 100,
-        status_filter: Optional[str] = None
+        status_filter: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Job]:
         """Get all jobs for a user."""
-        query = db.query(Job).filter(Job.user_id == user_id)
-        
-        if status_filter:
-            query = query.filter(Job.status == status_filter)
-        
-        return query.order_by(Job.created_at.desc()).offset(skip).limit(limit).all()
+        query = user_jobs_query(user_id, skip, limit, status_filter, cursor)
+        return list(db.scalars(query).all())
     
     def update_job(self, db: Session, job_id: uuid.UUID, update_data: JobUpdate) -> Job:
         """Update job details."""
@@ -83,21 +169,47 @@ class JobService:
             setattr(job, key, value)
         
         db.commit()
+        self.cache.invalidate(job_id)
         db.refresh(job)
+        if "status" in update_dict:
+            event_service.publish_status(job)
         return job
     
+    def update_jobs(self, db: Session, updates: List[JobBulkUpdateItem]) -> List[Job]:
+        """Apply many job updates with one SELECT and one commit; unknown ids are skipped."""
+        jobs = {job.id: job for job in db.scalars(select(Job).where(Job.id.in_([u.id for u in updates])))}
+        changed = []
+        for update in updates:
+            job = jobs.get(update.id)
+            if not job:
+                continue
+            update_dict = update.model_dump(exclude_unset=True, exclude={"id"})
+            for key, value in update_dict.items():
+                setattr(job, key, value)
+            changed.append((job, "status" in update_dict))
+        
+        db.commit()
+        for job, status_changed in changed:
+            self.cache.invalidate(job.id)
+            if status_changed:
+                event_service.publish_status(job)
+        return [job for job, _ in changed]
+    
     def cancel_job(self, db: Session, job_id: uuid.UUID) -> bool:
         """Cancel a job."""
         job = self.get_job(db, job_id)
         if not job:
             return False
         
-        if job.status in ["queued"]:
-            # Remove from Redis queue
-            self.redis_client.zrem("job_queue", str(job_id))
+        # Drop it from the queue, lease included. A worker running it sees
+        # the status on its next cancellation poll, or the lost lease on
+        # its next heartbeat, and terminates the run
+        self.queue.remove(job_id)
         
         job.status = "cancelled"
         db.commit()
+        self.cache.invalidate(job_id)
+        event_service.publish_status(job)
         return True
     
     def get_job_metrics(
@@ -107,27 +219,156 @@ class JobService:
         metric_name: Optional[str] = None
     ) -> dict:
         """Get metrics for a job."""
-        from backend.models.job import Metric
-        
-        query = db.query(Metric).filter(Metric.job_id == job_id)
+        query = (
+            select(MetricName.name, MetricPoint.step, MetricPoint.metric_value, MetricPoint.timestamp)
+            .join(MetricName, MetricName.id == MetricPoint.name_id)
+            .where(MetricPoint.job_id == job_id)
+        )
         
         if metric_name:
-            query = query.filter(Metric.metric_name == metric_name)
+            query = query.where(MetricName.name == metric_name)
         
-        metrics = query.order_by(Metric.timestamp).all()
+        # Primary key order; steps are monotonic within a series
+        query = query.order_by(MetricPoint.name_id, MetricPoint.step)
         
         # Group by metric name
         result = {}
-        for metric in metrics:
-            if metric.metric_name not in result:
-                result[metric.metric_name] = []
-            
-            result[metric.metric_name].append({
-                "step": metric.step,
-                "value": metric.metric_value,
-                "timestamp": metric.timestamp.isoformat()
+        for name, step, value, timestamp in db.execute(query):
+            result.setdefault(name, []).append({
+                "step": step,
+                "value": value,
+                "timestamp": timestamp.isoformat()
             })
         
         return result
 
+    def get_job_metric_series(
+        self,
+        db: Session,
+        job_id: uuid.UUID,
+        metric_name: Optional[str] = None,
+        max_points: Optional[int] = None,
+        step_min: Optional[int] = None,
+        step_max: Optional[int] = None,
+        aggregation: str = "lttb"
+    ) -> dict:
+        """Get metrics as per-name step/value column arrays.
+
+        Series longer than ``max_points`` are reduced with LTTB (on the
+        step/value columns only) or bucketed in SQL (``mean``/``minmax``),
+        so the payload size follows the chart width, not the run length.
+        Downsampled reads come from the rollup tables; only LTTB over
+        short series touches raw points.
+        """
+        if metric_name:
+            names = resolve_name_ids(db, [metric_name])
+            extents = series_extents(db, job_id, list(names), step_min, step_max)
+        else:
+            # The job's own series, found through its rollups
+            extents = series_extents(db, job_id, None, step_min, step_max)
+            names = name_labels(db, list(extents))
+
+        raw_ids = [
+            name_id for name_id, (count, _, _) in extents.items()
+            if not max_points
+            or count <= max_points
+            or aggregation == "none"
+            or (aggregation == "lttb" and count <= RAW_SCAN_LIMIT)
+        ]
+
+        result = {}
+
+        if raw_ids:
+            columns = raw_series(db, job_id, raw_ids, step_min, step_max)
+            for name_id, (steps, values) in columns.items():
+                if not steps:
+                    continue
+                total_points = len(steps)
+                if max_points and aggregation == "lttb":
+                    steps, values = lttb(steps, values, max_points)
+                result[names[name_id]] = {"steps": steps, "values": values, "total_points": total_points}
+
+        for name_id, (count, first_step, last_step) in extents.items():
+            if name_id in raw_ids:
+                continue
+
+            if aggregation == "lttb":
+                resolution = finest_resolution(last_step - first_step + 1, RAW_SCAN_LIMIT)
+                steps, values = rollup_series(db, job_id, name_id, resolution, first_step, last_step)
+                steps, values = lttb(steps, values, max_points)
+                result[names[name_id]] = {"steps": steps, "values": values, "total_points": count}
+                continue
+
+            steps, values, lows, highs = bucketed_series(db, job_id, name_id, max_points, first_step, last_step)
+            series = {"steps": steps, "values": values, "total_points": count}
+            if aggregation == "minmax":
+                series["min"] = lows
+                series["max"] = highs
+            result[names[name_id]] = series
+
+        return result
+
+class AsyncJobService:
+    """JobService for AsyncSession; shares the sync service's queue and cache."""
+
+    def __init__(self, jobs: JobService):
+        self._jobs = jobs
+
+    @property
+    def queue(self) -> JobQueue:
+        return self._jobs.queue
+
+    @property
+    def cache(self) -> JobCache:
+        return self._jobs.cache
+
+    async def create_job(self, db: AsyncSession, job_data: JobCreate, user_id: uuid.UUID) -> Job:
+        """Create a new job in database."""
+        job = Job(**job_values(job_data, user_id))
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    async def create_jobs(self, db: AsyncSession, jobs_data: List[JobCreate], user_id: uuid.UUID) -> List[Job]:
+        """Create many jobs with a single multi-row INSERT ... RETURNING."""
+        rows = [job_values(job_data, user_id) for job_data in jobs_data]
+        for row in rows:
+            # Ids are assigned here so the returned rows keep the request order
+            row["id"] = uuid.uuid4()
+        jobs = list((await db.scalars(insert(Job).returning(Job), rows)).all())
+        await db.commit()
+        order = {row["id"]: index for index, row in enumerate(rows)}
+        return sorted(jobs, key=lambda job: order[job.id])
+
+    def enqueue_job(self, job: Job):
+        """Add a created job to the queue (blocking; run as a background task)."""
+        self.enqueue_jobs([job])
+
+    def enqueue_jobs(self, jobs: List[Job]):
+        """Add created jobs to the queue in one pipelined call (blocking)."""
+        self.queue.enqueue_many([
+            (job.id, job.priority, {"gpu_count": job.gpu_count, "memory_gb": job.memory_gb})
+            for job in jobs
+        ])
+
+    async def get_job(self, db: AsyncSession, job_id: uuid.UUID) -> Optional[Job]:
+        """Get job by ID."""
+        return await db.get(Job, job_id)
+
+    async def get_job_cached(self, db: AsyncSession, job_id: uuid.UUID) -> Optional[JobResponse]:
+        """Get job by ID through the read-through cache (its Redis calls run in a thread)."""
+        cached, gen = await asyncio.to_thread(self.cache.get, job_id)
+        if cached:
+            return cached
+
+        job = await self.get_job(db, job_id)
+        if not job:
+            return None
+
+        response = JobResponse.model_validate(job)
+        await asyncio.to_thread(self.cache.set, job_id, response, gen)
+        return response
+
 job_service = JobService()
+async_job_service = AsyncJobService(job_service)
@@ -0,0 +1,72 @@
+from functools import cached_property
+from typing import AsyncIterator
+import uuid
+
+from backend.core.clients import get_async_redis, get_redis
+from backend.core.job_logs import log_stream_key
+from backend.services.event_service import TERMINAL_STATUSES
+
+class LogService:
+    @cached_property
+    def redis_client(self):
+        return get_redis()
+
+    @cached_property
+    def async_redis(self):
+        return get_async_redis()
+
+    def read_logs(self, job_id: uuid.UUID, offset: str = "0", limit: int = 1000) -> dict:
+        """Read up to ``limit`` log lines after ``offset`` (a stream entry ID)."""
+        start = "-" if offset == "0" else f"({offset}"
+        entries = self.redis_client.xrange(log_stream_key(job_id), min=start, max="+", count=limit)
+
+        lines = []
+        next_offset = offset
+        finished = False
+        for entry_id, fields in entries:
+            next_offset = entry_id
+            if "eof" in fields:
+                finished = True
+                continue
+            lines.append(fields.get("line", ""))
+
+        return {"lines": lines, "next_offset": next_offset, "finished": finished}
+
+    async def follow_logs(
+        self,
+        job_id: uuid.UUID,
+        status,
+        offset: str = "0",
+        keepalive_seconds: int = 15
+    ) -> AsyncIterator[str]:
+        """Yield log lines after ``offset`` as server-sent events until the job ends.
+
+        The stream ends at the log's end marker, or, for jobs that never
+        write one (cancelled while queued, crashed worker, expired log),
+        once ``status()`` reports a terminal status and no lines are left.
+        """
+        key = log_stream_key(job_id)
+        last_id = offset
+        while True:
+            result = await self.async_redis.xread({key: last_id}, count=500, block=keepalive_seconds * 1000)
+            if not result:
+                if await status() in TERMINAL_STATUSES:
+                    # Lines written just before the status changed
+                    result = await self.async_redis.xread({key: last_id}, count=500)
+                    if not result:
+                        yield "event: end\ndata: \n\n"
+                        return
+                else:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+
+            for _, entries in result:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    if "eof" in fields:
+                        yield f"id: {entry_id}\nevent: end\ndata: \n\n"
+                        return
+                    yield f"id: {entry_id}\ndata: {fields.get('line', '')}\n\n"
+
+log_service = LogService()
@@ -1,21 +1,188 @@
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import uuid
 
-from backend.models.job import Metric
+from backend.models.job import MetricName, MetricPoint
 from backend.schemas.metric import MetricCreate
+from backend.services.event_service import event_service
+from backend.services.metric_store import (
+    MetricNameCache,
+    chunks,
+    name_insert,
+    name_select,
+    overlaps,
+    point_insert,
+    point_upsert,
+    rebuild_points,
+    rollup_replace,
+    rollup_rows,
+    rollup_upsert,
+    series_heads,
+)
+
+# Metric points per query when replaying a job's history to a stream
+REPLAY_PAGE_SIZE = 5000
+
+# Shared by both services; filled after a commit so ids always exist
+metric_names = MetricNameCache()
+
+def point_rows(job_id: uuid.UUID, metrics: List[MetricCreate], name_ids: Dict[str, int]) -> List[dict]:
+    """Rows to store; a step sent twice in one batch keeps its last value."""
+    rows = {
+        (name_ids[m.metric_name], m.step): {
+            "job_id": job_id,
+            "name_id": name_ids[m.metric_name],
+            "step": m.step,
+            "metric_value": m.metric_value,
+            "timestamp": m.timestamp
+        }
+        for m in metrics
+    }
+    return list(rows.values())
+
+def point_dict(metric: MetricCreate) -> dict:
+    return {
+        "step": metric.step,
+        "metric_name": metric.metric_name,
+        "metric_value": metric.metric_value,
+        "timestamp": metric.timestamp.isoformat()
+    }
 
 class MetricService:
-    def create_metric(self, db: Session, job_id: uuid.UUID, metric_data: MetricCreate) -> Metric:
-        metric = Metric(
-            job_id=job_id,
-            step=metric_data.step,
-            metric_name=metric_data.metric_name,
-            metric_value=metric_data.metric_value,
-            timestamp=metric_data.timestamp
-        )
-        db.add(metric)
+    def create_metric(self, db: Session, job_id: uuid.UUID, metric_data: MetricCreate) -> dict:
+        self.create_metrics(db, job_id, [metric_data])
+        return point_dict(metric_data)
+
+    def create_metrics(self, db: Session, job_id: uuid.UUID, metrics: List[MetricCreate]) -> int:
+        """Store points and fold them into rollups in one transaction.
+
+        Re-sent identical points are skipped, so retried batches are not
+        counted twice; a new value for a stored step replaces it and the
+        affected rollup buckets are rebuilt. Returns the number of points
+        written.
+        """
+        if not metrics:
+            return 0
+        dialect = db.get_bind().dialect.name
+
+        name_ids, missing = metric_names.lookup({m.metric_name for m in metrics})
+        if missing:
+            db.execute(name_insert(dialect, missing))
+            name_ids.update(db.execute(name_select(missing)).all())
+
+        points = point_rows(job_id, metrics, name_ids)
+        heads = dict(db.execute(series_heads(job_id, list(set(name_ids.values())))).all())
+        written = []
+        if not overlaps(points, heads):
+            # Appending past the end of every series: fold new points in
+            for rows in chunks(points):
+                written.extend(db.execute(point_insert(dialect, rows)).all())
+            for rows in chunks(rollup_rows(job_id, written)):
+                db.execute(rollup_upsert(dialect, rows))
+        else:
+            for rows in chunks(points):
+                written.extend(db.execute(point_upsert(dialect, rows)).all())
+            if written:
+                stored = db.execute(rebuild_points(job_id, written)).all()
+                for rows in chunks(rollup_rows(job_id, stored)):
+                    db.execute(rollup_replace(dialect, rows))
         db.commit()
-        db.refresh(metric)
-        return metric
+
+        metric_names.remember(name_ids)
+        event_service.publish_metrics(job_id, metrics)
+        return len(written)
+
+class AsyncMetricService:
+    """MetricService for AsyncSession."""
+
+    async def create_metric(self, db: AsyncSession, job_id: uuid.UUID, metric_data: MetricCreate) -> dict:
+        await self.create_metrics(db, job_id, [metric_data])
+        return point_dict(metric_data)
+
+    async def create_metrics(self, db: AsyncSession, job_id: uuid.UUID, metrics: List[MetricCreate]) -> int:
+        if not metrics:
+            return 0
+        dialect = db.get_bind().dialect.name
+
+        name_ids, missing = metric_names.lookup({m.metric_name for m in metrics})
+        if missing:
+            await db.execute(name_insert(dialect, missing))
+            name_ids.update((await db.execute(name_select(missing))).all())
+
+        points = point_rows(job_id, metrics, name_ids)
+        heads = dict((await db.execute(series_heads(job_id, list(set(name_ids.values()))))).all())
+        written = []
+        if not overlaps(points, heads):
+            for rows in chunks(points):
+                written.extend((await db.execute(point_insert(dialect, rows))).all())
+            for rows in chunks(rollup_rows(job_id, written)):
+                await db.execute(rollup_upsert(dialect, rows))
+        else:
+            for rows in chunks(points):
+                written.extend((await db.execute(point_upsert(dialect, rows))).all())
+            if written:
+                stored = (await db.execute(rebuild_points(job_id, written))).all()
+                for rows in chunks(rollup_rows(job_id, stored)):
+                    await db.execute(rollup_replace(dialect, rows))
+        await db.commit()
+
+        metric_names.remember(name_ids)
+        await event_service.apublish_metrics(job_id, metrics)
+        return len(written)
+
+    async def iter_metrics_since(
+        self,
+        db: AsyncSession,
+        job_id: uuid.UUID,
+        since_step: int,
+        page_size: int = REPLAY_PAGE_SIZE
+    ) -> AsyncIterator[Tuple[List[dict], Optional[int]]]:
+        """Metric points after ``since_step`` in (step, metric) order, for stream resumption.
+
+        Yields ``(points, complete_step)`` pages, where ``complete_step`` is
+        the last step whose points have all been yielded, or None while a
+        step spans pages. Pages are read by keyset until none are left.
+        """
+        after = None
+        held = []
+        while True:
+            query = (
+                select(MetricPoint.step, MetricPoint.name_id, MetricName.name, MetricPoint.metric_value)
+                .join(MetricName, MetricName.id == MetricPoint.name_id)
+                .where(MetricPoint.job_id == job_id)
+                .order_by(MetricPoint.step, MetricPoint.name_id)
+                .limit(page_size)
+            )
+            if after is None:
+                query = query.where(MetricPoint.step > since_step)
+            else:
+                query = query.where(or_(
+                    MetricPoint.step > after[0],
+                    and_(MetricPoint.step == after[0], MetricPoint.name_id > after[1])
+                ))
+            rows = (await db.execute(query)).all()
+            points = held + [
+                {"step": step, "metric_name": name, "metric_value": value}
+                for step, _, name, value in rows
+            ]
+            if len(rows) < page_size:
+                if points:
+                    yield points, points[-1]["step"]
+                return
+
+            # The page's last step may continue in the next one
+            after = (rows[-1].step, rows[-1].name_id)
+            cut = len(points)
+            while cut and points[cut - 1]["step"] == after[0]:
+                cut -= 1
+            if cut:
+                yield points[:cut], points[cut - 1]["step"]
+                held = points[cut:]
+            else:
+                yield points, None
+                held = []
 
 metric_service = MetricService()
+async_metric_service = AsyncMetricService()
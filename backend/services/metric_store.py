@@ -0,0 +1,366 @@
+"""Time-series storage for job metrics.
+
+Points live in ``metric_points`` keyed by (job, interned name, step). Every
+ingest also folds the newly inserted points into ``metric_rollups``
+(min/max/sum/count/last per bucket of 10, 100, 1000 and 10000 steps), so
+long series can be charted from a few hundred pre-aggregated rows instead
+of scanning every point.
+
+The last write of a step wins: a run resumed from a checkpoint logs the
+steps after it again, and those values replace the ones from before the
+crash. Batches that rewrite stored steps rebuild their rollup buckets
+from the points; re-sent identical points change nothing.
+
+The builders here only construct statements; the sync and async metric
+services execute them.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import uuid
+
+from sqlalchemy import BigInteger, and_, case, cast, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend.models.job import MetricName, MetricPoint, MetricRollup, ROLLUP_RESOLUTIONS
+
+# Rows per INSERT statement; keeps bind parameters well below driver limits.
+BATCH_INSERT_CHUNK = 1000
+
+# Above this many points a series is downsampled from rollups, not raw points
+RAW_SCAN_LIMIT = 50000
+
+def dialect_insert(dialect_name: str):
+    """INSERT construct supporting ON CONFLICT for the session's database."""
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"Metric storage does not support {dialect_name}")
+
+def chunks(rows: List[dict], size: int = BATCH_INSERT_CHUNK) -> Iterable[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+class MetricNameCache:
+    """Process-wide name -> id map; only committed ids are remembered."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """Split names into known ids and names still to be interned."""
+        known, missing = {}, []
+        with self._lock:
+            for name in names:
+                if name in self._ids:
+                    known[name] = self._ids[name]
+                else:
+                    missing.append(name)
+        return known, missing
+
+    def remember(self, ids: Dict[str, int]):
+        with self._lock:
+            self._ids.update(ids)
+
+def name_insert(dialect_name: str, names: List[str]):
+    return (
+        dialect_insert(dialect_name)(MetricName)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+
+def name_select(names: List[str]):
+    return select(MetricName.name, MetricName.id).where(MetricName.name.in_(names))
+
+def point_insert(dialect_name: str, rows: List[dict]):
+    """Insert points, skipping (job, name, step) duplicates, returning the new ones."""
+    return (
+        dialect_insert(dialect_name)(MetricPoint)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["job_id", "name_id", "step"])
+        .returning(MetricPoint.name_id, MetricPoint.step, MetricPoint.metric_value)
+    )
+
+def series_heads(job_id: uuid.UUID, name_ids: List[int]):
+    """Last stored step per series, read from the coarsest rollups."""
+    return (
+        select(MetricRollup.name_id, func.max(MetricRollup.last_step))
+        .where(
+            MetricRollup.job_id == job_id,
+            MetricRollup.resolution == ROLLUP_RESOLUTIONS[-1],
+            MetricRollup.name_id.in_(name_ids)
+        )
+        .group_by(MetricRollup.name_id)
+    )
+
+def overlaps(rows: List[dict], heads: Dict[int, int]) -> bool:
+    """Whether any point row may rewrite an already stored step."""
+    return any(row["step"] <= heads.get(row["name_id"], -1) for row in rows)
+
+def point_upsert(dialect_name: str, rows: List[dict]):
+    """Insert points, overwriting stored steps whose value changed; returns the written ones."""
+    stmt = dialect_insert(dialect_name)(MetricPoint).values(rows)
+    new = stmt.excluded
+    return (
+        stmt.on_conflict_do_update(
+            index_elements=["job_id", "name_id", "step"],
+            set_={"metric_value": new.metric_value, "timestamp": new.timestamp},
+            where=MetricPoint.metric_value != new.metric_value
+        )
+        .returning(MetricPoint.name_id, MetricPoint.step, MetricPoint.metric_value)
+    )
+
+def rebuild_points(job_id: uuid.UUID, written: Iterable[Tuple[int, int, float]]):
+    """All points in the coarsest rollup buckets that ``written`` points fall in.
+
+    The buckets of every resolution inside that range can then be
+    recomputed from scratch with ``rollup_rows``.
+    """
+    resolution = ROLLUP_RESOLUTIONS[-1]
+    ranges = {}
+    for name_id, step, _ in written:
+        first, last = ranges.get(name_id, (step, step))
+        ranges[name_id] = (min(first, step), max(last, step))
+    return (
+        select(MetricPoint.name_id, MetricPoint.step, MetricPoint.metric_value)
+        .where(
+            MetricPoint.job_id == job_id,
+            or_(*(
+                and_(
+                    MetricPoint.name_id == name_id,
+                    MetricPoint.step >= first // resolution * resolution,
+                    MetricPoint.step < (last // resolution + 1) * resolution
+                )
+                for name_id, (first, last) in ranges.items()
+            ))
+        )
+    )
+
+def rollup_rows(job_id: uuid.UUID, points: Iterable[Tuple[int, int, float]]) -> List[dict]:
+    """Aggregate ``(name_id, step, value)`` points into one row per rollup bucket."""
+    aggregates = {}
+    for name_id, step, value in points:
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (name_id, resolution, step // resolution)
+            agg = aggregates.get(key)
+            if agg is None:
+                aggregates[key] = [value, value, value, 1, step, value]
+                continue
+            agg[0] = min(agg[0], value)
+            agg[1] = max(agg[1], value)
+            agg[2] += value
+            agg[3] += 1
+            if step >= agg[4]:
+                agg[4] = step
+                agg[5] = value
+
+    # Sorted so concurrent ingests for a job lock buckets in the same order
+    return [
+        {
+            "job_id": job_id,
+            "name_id": name_id,
+            "resolution": resolution,
+            "bucket": bucket,
+            "min_value": agg[0],
+            "max_value": agg[1],
+            "sum_value": agg[2],
+            "count": agg[3],
+            "last_step": agg[4],
+            "last_value": agg[5],
+        }
+        for (name_id, resolution, bucket), agg in sorted(aggregates.items())
+    ]
+
+def rollup_upsert(dialect_name: str, rows: List[dict]):
+    """Merge bucket aggregates into existing rollups."""
+    least, greatest = (func.least, func.greatest) if dialect_name == "postgresql" else (func.min, func.max)
+    stmt = dialect_insert(dialect_name)(MetricRollup).values(rows)
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["job_id", "name_id", "resolution", "bucket"],
+        set_={
+            "min_value": least(MetricRollup.min_value, new.min_value),
+            "max_value": greatest(MetricRollup.max_value, new.max_value),
+            "sum_value": MetricRollup.sum_value + new.sum_value,
+            "count": MetricRollup.count + new.count,
+            "last_value": case(
+                (new.last_step >= MetricRollup.last_step, new.last_value),
+                else_=MetricRollup.last_value
+            ),
+            "last_step": greatest(MetricRollup.last_step, new.last_step),
+        }
+    )
+
+def rollup_replace(dialect_name: str, rows: List[dict]):
+    """Overwrite rollup buckets with aggregates recomputed from all their points."""
+    stmt = dialect_insert(dialect_name)(MetricRollup).values(rows)
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["job_id", "name_id", "resolution", "bucket"],
+        set_={
+            column: new[column]
+            for column in ("min_value", "max_value", "sum_value", "count", "last_step", "last_value")
+        }
+    )
+
+def resolve_name_ids(db: Session, names: List[str]) -> Dict[int, str]:
+    query = select(MetricName.id, MetricName.name).where(MetricName.name.in_(names))
+    return dict(db.execute(query).all())
+
+def name_labels(db: Session, name_ids: List[int]) -> Dict[int, str]:
+    """``name_id -> name`` for the given ids only."""
+    if not name_ids:
+        return {}
+    query = select(MetricName.id, MetricName.name).where(MetricName.id.in_(name_ids))
+    return dict(db.execute(query).all())
+
+def series_extents(
+    db: Session,
+    job_id: uuid.UUID,
+    name_ids: Optional[List[int]] = None,
+    step_min: Optional[int] = None,
+    step_max: Optional[int] = None
+) -> Dict[int, Tuple[int, int, int]]:
+    """``name_id -> (count, first_step, last_step)`` for the series of a job.
+
+    Counts come from the coarsest rollup, so with a step range they are
+    rounded out to whole coarse buckets; that is precise enough to pick a
+    read strategy. First and last steps are primary-key endpoint lookups.
+    """
+    resolution = ROLLUP_RESOLUTIONS[-1]
+    query = (
+        select(MetricRollup.name_id, func.sum(MetricRollup.count))
+        .where(MetricRollup.job_id == job_id, MetricRollup.resolution == resolution)
+        .group_by(MetricRollup.name_id)
+    )
+    if name_ids is not None:
+        query = query.where(MetricRollup.name_id.in_(name_ids))
+    if step_min is not None:
+        query = query.where(MetricRollup.bucket >= step_min // resolution)
+    if step_max is not None:
+        query = query.where(MetricRollup.bucket <= step_max // resolution)
+    counts = dict(db.execute(query).all())
+
+    extents = {}
+    for name_id, count in counts.items():
+        bounds = select(func.min(MetricPoint.step), func.max(MetricPoint.step)).where(
+            MetricPoint.job_id == job_id, MetricPoint.name_id == name_id
+        )
+        if step_min is not None:
+            bounds = bounds.where(MetricPoint.step >= step_min)
+        if step_max is not None:
+            bounds = bounds.where(MetricPoint.step <= step_max)
+        first_step, last_step = db.execute(bounds).one()
+        if first_step is not None:
+            extents[name_id] = (int(count), first_step, last_step)
+    return extents
+
+def raw_series(
+    db: Session,
+    job_id: uuid.UUID,
+    name_ids: List[int],
+    step_min: Optional[int] = None,
+    step_max: Optional[int] = None
+) -> Dict[int, Tuple[List[int], List[float]]]:
+    """Raw step/value columns per name, read along the primary key."""
+    query = (
+        select(MetricPoint.name_id, MetricPoint.step, MetricPoint.metric_value)
+        .where(MetricPoint.job_id == job_id, MetricPoint.name_id.in_(name_ids))
+        .order_by(MetricPoint.name_id, MetricPoint.step)
+    )
+    if step_min is not None:
+        query = query.where(MetricPoint.step >= step_min)
+    if step_max is not None:
+        query = query.where(MetricPoint.step <= step_max)
+
+    columns = {name_id: ([], []) for name_id in name_ids}
+    for name_id, step, value in db.execute(query):
+        columns[name_id][0].append(step)
+        columns[name_id][1].append(value)
+    return columns
+
+def finest_resolution(span: int, max_rows: int) -> int:
+    """Smallest rollup resolution that yields at most ``max_rows`` buckets."""
+    for resolution in ROLLUP_RESOLUTIONS:
+        if span / resolution <= max_rows:
+            return resolution
+    return ROLLUP_RESOLUTIONS[-1]
+
+def rollup_series(
+    db: Session,
+    job_id: uuid.UUID,
+    name_id: int,
+    resolution: int,
+    step_min: Optional[int] = None,
+    step_max: Optional[int] = None
+) -> Tuple[List[int], List[float]]:
+    """Bucket start steps and means of one rollup resolution."""
+    query = (
+        select(MetricRollup.bucket, MetricRollup.sum_value, MetricRollup.count)
+        .where(
+            MetricRollup.job_id == job_id,
+            MetricRollup.name_id == name_id,
+            MetricRollup.resolution == resolution
+        )
+        .order_by(MetricRollup.bucket)
+    )
+    if step_min is not None:
+        query = query.where(MetricRollup.bucket >= step_min // resolution)
+    if step_max is not None:
+        query = query.where(MetricRollup.bucket <= step_max // resolution)
+
+    steps, values = [], []
+    for bucket, total, count in db.execute(query):
+        steps.append(bucket * resolution)
+        values.append(total / count)
+    return steps, values
+
+def bucketed_series(
+    db: Session,
+    job_id: uuid.UUID,
+    name_id: int,
+    max_points: int,
+    first_step: int,
+    last_step: int
+) -> Tuple[List[int], List[float], List[float], List[float]]:
+    """Regroup rollup buckets into ``max_points`` chart buckets in SQL.
+
+    Reads the coarsest resolution that still has at least ``max_points``
+    buckets between the two steps, and returns steps, means, mins and
+    maxes. Rollup buckets straddling either end are taken whole.
+    """
+    span = last_step - first_step + 1
+    resolution = ROLLUP_RESOLUTIONS[0]
+    for candidate in ROLLUP_RESOLUTIONS:
+        if span / candidate >= max_points:
+            resolution = candidate
+
+    start = MetricRollup.bucket * resolution
+    chart_bucket = (cast(start - first_step, BigInteger) * max_points) // span
+    query = (
+        select(
+            func.min(start),
+            func.sum(MetricRollup.sum_value) / func.sum(MetricRollup.count),
+            func.min(MetricRollup.min_value),
+            func.max(MetricRollup.max_value)
+        )
+        .where(
+            MetricRollup.job_id == job_id,
+            MetricRollup.name_id == name_id,
+            MetricRollup.resolution == resolution,
+            MetricRollup.bucket >= first_step // resolution,
+            MetricRollup.bucket <= last_step // resolution
+        )
+        .group_by(chart_bucket)
+        .order_by(func.min(start))
+    )
+
+    steps, means, lows, highs = [], [], [], []
+    for step, mean, low, high in db.execute(query):
+        steps.append(max(step, first_step))
+        means.append(float(mean))
+        lows.append(low)
+        highs.append(high)
+    return steps, means, lows, highs
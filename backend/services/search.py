@@ -0,0 +1,109 @@
+"""Trial suggestion for experiments over a ``backend.core.search_space`` space.
+
+``grid`` enumerates choice parameters, ``random`` samples independently and
+``bayesian`` uses a small Tree-structured Parzen Estimator over the finished
+trials, falling back to random sampling until enough of them exist.
+"""
+import math
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.search_space import grid_point, grid_size, sample_random
+
+SEARCH_ALGORITHMS = ("grid", "random", "bayesian")
+
+# TPE settings
+TPE_STARTUP_TRIALS = 5
+TPE_GAMMA = 0.25
+TPE_CANDIDATES = 24
+
+def _to_unit(spec: dict, value) -> float:
+    """Map a numeric value into [0, 1] (log scale for loguniform)."""
+    low, high = spec["low"], spec["high"]
+    if spec["type"] == "loguniform":
+        low, high, value = math.log(low), math.log(high), math.log(value)
+    return (value - low) / (high - low) if high > low else 0.5
+
+def _from_unit(spec: dict, unit: float):
+    low, high = spec["low"], spec["high"]
+    unit = min(1.0, max(0.0, unit))
+    if spec["type"] == "loguniform":
+        return math.exp(math.log(low) + unit * (math.log(high) - math.log(low)))
+    value = low + unit * (high - low)
+    return int(round(value)) if spec["type"] == "int" else value
+
+def _parzen(points: List[float], x: float) -> float:
+    """Density of a Gaussian mixture on [0, 1] with a uniform prior component."""
+    bandwidth = max(0.05, 1.0 / (len(points) + 1))
+    density = 1.0
+    for center in points:
+        density += math.exp(-0.5 * ((x - center) / bandwidth) ** 2) / (bandwidth * math.sqrt(2 * math.pi))
+    return density / (len(points) + 1)
+
+def _categorical(values: List[Any], observed: List[Any], x) -> float:
+    return (observed.count(x) + 1) / (len(observed) + len(values))
+
+def suggest_tpe(
+    space: Dict[str, dict],
+    history: List[Tuple[Dict[str, Any], float]],
+    mode: str,
+    rng: random.Random
+) -> Dict[str, Any]:
+    """Sample near good trials and pick the candidate maximizing l(x) / g(x).
+
+    ``history`` holds ``(params, objective)`` of finished trials. Each
+    parameter is modelled independently.
+    """
+    if len(history) < TPE_STARTUP_TRIALS:
+        return sample_random(space, rng)
+
+    ranked = sorted(history, key=lambda item: item[1], reverse=(mode == "max"))
+    n_good = max(1, int(math.ceil(TPE_GAMMA * len(ranked))))
+    good = [params for params, _ in ranked[:n_good]]
+    bad = [params for params, _ in ranked[n_good:]]
+
+    best, best_score = None, -math.inf
+    for _ in range(TPE_CANDIDATES):
+        candidate, score = {}, 0.0
+        for key, spec in space.items():
+            good_values = [p[key] for p in good if key in p]
+            bad_values = [p[key] for p in bad if key in p]
+
+            if spec["type"] == "choice":
+                weights = [_categorical(spec["values"], good_values, v) for v in spec["values"]]
+                value = rng.choices(spec["values"], weights=weights)[0]
+                score += math.log(_categorical(spec["values"], good_values, value))
+                score -= math.log(_categorical(spec["values"], bad_values, value))
+            else:
+                good_units = [_to_unit(spec, v) for v in good_values]
+                bad_units = [_to_unit(spec, v) for v in bad_values]
+                if good_units and rng.random() > 1.0 / (len(good_units) + 1):
+                    center = rng.choice(good_units)
+                    unit = rng.gauss(center, max(0.05, 1.0 / (len(good_units) + 1)))
+                else:
+                    unit = rng.random()
+                value = _from_unit(spec, unit)
+                unit = _to_unit(spec, value)
+                score += math.log(_parzen(good_units, unit)) - math.log(_parzen(bad_units, unit))
+            candidate[key] = value
+
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+def suggest(
+    algorithm: str,
+    space: Dict[str, dict],
+    trial_index: int,
+    history: List[Tuple[Dict[str, Any], float]],
+    mode: str,
+    rng: random.Random
+) -> Optional[Dict[str, Any]]:
+    """Params for the next trial, or None once a grid is exhausted."""
+    if algorithm == "grid":
+        if trial_index >= grid_size(space):
+            return None
+        return grid_point(space, trial_index)
+    if algorithm == "bayesian":
+        return suggest_tpe(space, history, mode, rng)
+    return sample_random(space, rng)
@@ -0,0 +1,114 @@
+"""In-process stand-ins for the API's dependencies and a small load generator.
+
+``build_app`` points the backend at a throwaway SQLite file and a shared
+fakeredis server, so the benchmarks exercise the real routes, services and
+queue code without Postgres or Redis. Requests go through
+``httpx.ASGITransport``: client and server share one event loop and one
+process, so compare numbers only against baselines from the same machine.
+"""
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+def configure_environment(workdir: Path):
+    """Must run before anything imports ``backend.core.config``."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+def build_app():
+    """The API app wired to fakeredis, with requests authenticated as one user.
+
+    Returns ``(app, user, redis_client)``.
+    """
+    import fakeredis
+    import fakeredis.aioredis
+
+    from backend.api.deps import get_current_user
+    from backend.api.main import app
+    from backend.core.job_queue import JobQueue
+    from backend.core.scheduler import Scheduler
+    from backend.database import SessionLocal, engine
+    from backend.models import Base, User
+    from backend.services.event_service import EventBroker, event_service
+    from backend.services.job_cache import JobCache
+    from backend.services.job_service import job_service
+    from backend.services.log_service import log_service
+
+    server = fakeredis.FakeServer()
+    redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    async_redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+
+    job_service.redis_client = redis_client
+    job_service.queue = JobQueue(redis_client)
+    job_service.scheduler = Scheduler(job_service.queue)
+    job_service.cache = JobCache(redis_client)
+    event_service.redis_client = redis_client
+    event_service.async_redis = async_redis
+    event_service.broker = EventBroker(async_redis)
+    log_service.redis_client = redis_client
+    log_service.async_redis = async_redis
+
+    # Stands in for the migrations on the throwaway database
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(username="bench", email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+
+    # The auth dependency is still a stub; pin it so ownership checks pass
+    app.dependency_overrides[get_current_user] = lambda: user
+    return app, user, redis_client
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (milliseconds) of one scenario."""
+    ordered = sorted(latencies)
+    def percentile(q: float) -> float:
+        if not ordered:
+            return 0.0
+        return round(1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "operations": len(ordered),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_per_s": round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * statistics.fmean(ordered), 3) if ordered else 0.0,
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": percentile(1.0),
+        },
+    }
+
+async def run_load(request: Callable[[int], Awaitable], total: int, concurrency: int) -> dict:
+    """Issue ``request(i)`` for ``i`` in ``range(total)`` from ``concurrency`` tasks.
+
+    ``request`` returns an ``httpx.Response``; 4xx/5xx responses and
+    exceptions count as errors.
+    """
+    indices = iter(range(total))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for index in indices:
+            start = time.perf_counter()
+            try:
+                response = await request(index)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
@@ -0,0 +1,168 @@
+"""Run the benchmark suite and write (or check against) a JSON baseline.
+
+    python -m benchmarks.run                                  # write benchmarks/results/latest.json
+    python -m benchmarks.run --output benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --tolerance 0.25
+
+With ``--compare`` the exit status is 1 when any scenario's throughput
+dropped, or its p99 latency grew, by more than ``--tolerance``.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.harness import build_app, configure_environment
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="requests per HTTP scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per HTTP scenario")
+    parser.add_argument("--batch-points", type=int, default=100, help="points per metric batch request")
+    parser.add_argument("--series-points", type=int, default=10000, help="points per series for metric reads")
+    parser.add_argument("--queue-ops", type=int, default=2000, help="operations per queue scenario")
+    parser.add_argument("--dispatch-jobs", type=int, default=200, help="jobs for the dispatch latency scenario")
+    parser.add_argument("--startup-runs", type=int, default=10, help="fresh API processes per startup scenario")
+    parser.add_argument("--scenarios", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def run_http(app, selected, params) -> dict:
+    import httpx
+    from benchmarks.scenarios import HTTP_SCENARIOS
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name, scenario in HTTP_SCENARIOS.items():
+            if name in selected:
+                print(f"  {name} ...", flush=True)
+                results[name] = await scenario(client, **params)
+    return results
+
+def run_queue(redis_client, selected, params) -> dict:
+    from benchmarks.scenarios import QUEUE_SCENARIOS
+
+    results = {}
+    for name, scenario in QUEUE_SCENARIOS.items():
+        if name in selected:
+            print(f"  {name} ...", flush=True)
+            results[name] = scenario(redis_client, **params)
+    return results
+
+def run_process(selected, params) -> dict:
+    from benchmarks.scenarios import PROCESS_SCENARIOS
+
+    results = {}
+    for name, scenario in PROCESS_SCENARIOS.items():
+        if name in selected:
+            print(f"  {name} ...", flush=True)
+            results[name] = scenario(**params)
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if previous["throughput_per_s"] and current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_per_s']}/s vs {previous['throughput_per_s']}/s"
+            )
+        if previous["latency_ms"]["p99"] and current["latency_ms"]["p99"] > previous["latency_ms"]["p99"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p99 {current['latency_ms']['p99']}ms vs {previous['latency_ms']['p99']}ms"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors vs {previous['errors']}")
+    return regressions
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    params = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "batch_points": args.batch_points,
+        "series_points": args.series_points,
+        "queue_ops": args.queue_ops,
+        "dispatch_jobs": args.dispatch_jobs,
+        "startup_runs": args.startup_runs,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="nexus-bench-") as workdir:
+        configure_environment(Path(workdir))
+        # Stand-in services log every failed publish; keep the output readable
+        logging.disable(logging.WARNING)
+        app, _, redis_client = build_app()
+
+        from benchmarks.scenarios import HTTP_SCENARIOS, PROCESS_SCENARIOS, QUEUE_SCENARIOS
+        available = list(HTTP_SCENARIOS) + list(QUEUE_SCENARIOS) + list(PROCESS_SCENARIOS)
+        selected = args.scenarios or available
+        unknown = set(selected) - set(available)
+        if unknown:
+            print(f"Unknown scenarios: {', '.join(sorted(unknown))}; choose from {', '.join(available)}")
+            return 2
+
+        print("Running benchmarks:")
+        results = asyncio.run(run_http(app, selected, params))
+        results.update(run_queue(redis_client, selected, params))
+        results.update(run_process(selected, params))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "sqlite",
+            "redis": "fakeredis",
+        },
+        "params": params,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    for name, summary in results.items():
+        latency = summary["latency_ms"]
+        print(
+            f"{name:22s} {summary['throughput_per_s']:>10.1f}/s  "
+            f"p50 {latency['p50']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms  errors {summary['errors']}"
+        )
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("params") != params:
+            print(f"Warning: {args.compare} was recorded with different parameters: {baseline.get('params')}")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
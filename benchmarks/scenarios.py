@@ -0,0 +1,226 @@
+"""Benchmark scenarios; each returns the summary dict of ``harness.summarize``."""
+import json
+import math
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.harness import run_load, summarize
+
+JOB_CONFIG = {
+    "model": "resnet18",
+    "dataset": "cifar10",
+    "epochs": 1,
+    "batch_size": 64,
+    "learning_rate": 0.01,
+    "optimizer": "sgd",
+}
+
+def job_body(index: int) -> dict:
+    return {"name": f"bench-{index}", "config": JOB_CONFIG, "gpu_count": 0, "memory_gb": 8}
+
+def metric_body(step: int, name: str = "train_loss") -> dict:
+    return {
+        "step": step,
+        "metric_name": name,
+        "metric_value": 1.0 / (step + 1),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+async def create_job(client) -> str:
+    response = await client.post("/api/jobs/", json=job_body(0))
+    response.raise_for_status()
+    return response.json()["id"]
+
+async def job_submit(client, requests: int, concurrency: int, **_) -> dict:
+    """POST /api/jobs/ (insert plus queue push in a background task)."""
+    return await run_load(lambda i: client.post("/api/jobs/", json=job_body(i)), requests, concurrency)
+
+async def metric_post(client, requests: int, concurrency: int, **_) -> dict:
+    """POST /api/jobs/{id}/metrics, one point per request."""
+    job_id = await create_job(client)
+    url = f"/api/jobs/{job_id}/metrics"
+    return await run_load(lambda i: client.post(url, json=metric_body(i)), requests, concurrency)
+
+async def metric_post_batch(client, requests: int, concurrency: int, batch_points: int, **_) -> dict:
+    """POST /api/jobs/{id}/metrics/batch with ``batch_points`` points per request."""
+    job_id = await create_job(client)
+    url = f"/api/jobs/{job_id}/metrics/batch"
+
+    def request(i: int):
+        body = [metric_body(i * batch_points + offset) for offset in range(batch_points)]
+        return client.post(url, json=body)
+
+    summary = await run_load(request, requests, concurrency)
+    summary["points_per_s"] = round(summary["throughput_per_s"] * batch_points, 1)
+    return summary
+
+def seed_series(job_id: str, series_points: int, names=("train_loss", "train_accuracy")):
+    """Write long series straight through the metric service (not timed)."""
+    from backend.database import SessionLocal
+    from backend.schemas.metric import MetricCreate
+    from backend.services.metric_service import metric_service
+
+    start = datetime.utcnow()
+    chunk = 5000
+    with SessionLocal() as db:
+        for name in names:
+            for first in range(0, series_points, chunk):
+                metric_service.create_metrics(db, uuid.UUID(job_id), [
+                    MetricCreate(
+                        step=step,
+                        metric_name=name,
+                        metric_value=math.sin(step / 100.0),
+                        timestamp=start + timedelta(seconds=step)
+                    )
+                    for step in range(first, min(first + chunk, series_points))
+                ])
+
+async def metric_read(client, requests: int, concurrency: int, series_points: int, **_) -> dict:
+    """GET /api/jobs/{id}/metrics for one full series of ``series_points`` points."""
+    job_id = await create_job(client)
+    seed_series(job_id, series_points)
+    url = f"/api/jobs/{job_id}/metrics"
+    return await run_load(lambda i: client.get(url, params={"metric_name": "train_loss"}), requests, concurrency)
+
+async def metric_read_columnar(client, requests: int, concurrency: int, series_points: int, **_) -> dict:
+    """GET /api/jobs/{id}/metrics?format=columnar downsampled to 500 points per series."""
+    job_id = await create_job(client)
+    seed_series(job_id, series_points)
+    url = f"/api/jobs/{job_id}/metrics"
+    params = {"format": "columnar", "max_points": 500}
+    return await run_load(lambda i: client.get(url, params=params), requests, concurrency)
+
+def queue_enqueue(redis_client, queue_ops: int, **_) -> dict:
+    """JobQueue.enqueue, one job per call."""
+    from backend.core.job_queue import JobQueue
+
+    queue = JobQueue(redis_client, name="bench_queue")
+    latencies = []
+    start = time.perf_counter()
+    for i in range(queue_ops):
+        t = time.perf_counter()
+        queue.enqueue(f"job-{i}", priority=i % 3, resources={"gpu_count": 0, "memory_gb": 8})
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start)
+
+def queue_claim_ack(redis_client, queue_ops: int, **_) -> dict:
+    """JobQueue.claim followed by ack, draining what queue_enqueue-style pushes left."""
+    from backend.core.job_queue import JobQueue
+
+    queue = JobQueue(redis_client, name="bench_claim")
+    queue.enqueue_many([(f"job-{i}", 0, {"gpu_count": 0, "memory_gb": 8}) for i in range(queue_ops)])
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for _ in range(queue_ops):
+        t = time.perf_counter()
+        job_id = queue.claim("bench-worker")
+        if job_id:
+            queue.ack(job_id, "bench-worker")
+        else:
+            errors += 1
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+def dispatch_latency(redis_client, dispatch_jobs: int, **_) -> dict:
+    """Time from enqueue until a worker blocked in Scheduler.next_job holds the lease.
+
+    Jobs are enqueued one at a time, each after the previous one was
+    claimed, so every sample includes the worker's wake-up.
+    """
+    from backend.core.job_queue import JobQueue
+    from backend.core.scheduler import Scheduler
+
+    queue = JobQueue(redis_client, name="bench_dispatch")
+    scheduler = Scheduler(queue)
+    claimed = {}
+    ready = threading.Event()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            ready.set()
+            job_id = scheduler.next_job(
+                "bench-worker",
+                free_gpus=1,
+                free_memory=64,
+                total_gpus=1,
+                total_memory=64,
+                timeout=1
+            )
+            if job_id:
+                claimed[job_id] = time.perf_counter()
+                queue.ack(job_id, "bench-worker")
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(dispatch_jobs):
+        job_id = f"dispatch-{i}"
+        ready.wait(5)
+        ready.clear()
+        enqueued = time.perf_counter()
+        queue.enqueue(job_id, resources={"gpu_count": 0, "memory_gb": 8})
+        deadline = enqueued + 5
+        while job_id not in claimed and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        if job_id in claimed:
+            latencies.append(claimed[job_id] - enqueued)
+        else:
+            errors += 1
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join(2)
+    return summarize(latencies, elapsed, errors)
+
+def cold_starts(startup_runs: int, key: str) -> dict:
+    """``key`` of ``benchmarks.startup`` over ``startup_runs`` fresh processes.
+
+    One unmeasured run first writes the bytecode caches.
+    """
+    latencies, errors = [], 0
+    for run in range(startup_runs + 1):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup"],
+            capture_output=True, text=True, cwd=Path(__file__).parent.parent
+        )
+        if run == 0:
+            continue
+        if result.returncode != 0:
+            errors += 1
+            continue
+        latencies.append(json.loads(result.stdout.splitlines()[-1])[key])
+    return summarize(latencies, sum(latencies), errors)
+
+def api_import(startup_runs: int, **_) -> dict:
+    """Import of backend.api.main in a fresh process."""
+    return cold_starts(startup_runs, "import_s")
+
+def api_cold_start(startup_runs: int, **_) -> dict:
+    """Import, lifespan startup and the first GET /health in a fresh process."""
+    return cold_starts(startup_runs, "startup_s")
+
+HTTP_SCENARIOS = {
+    "job_submit": job_submit,
+    "metric_post": metric_post,
+    "metric_post_batch": metric_post_batch,
+    "metric_read": metric_read,
+    "metric_read_columnar": metric_read_columnar,
+}
+
+QUEUE_SCENARIOS = {
+    "queue_enqueue": queue_enqueue,
+    "queue_claim_ack": queue_claim_ack,
+    "dispatch_latency": dispatch_latency,
+}
+
+PROCESS_SCENARIOS = {
+    "api_import": api_import,
+    "api_cold_start": api_cold_start,
+}
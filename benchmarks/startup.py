@@ -0,0 +1,29 @@
+"""Cold start of one API process: ``python -m benchmarks.startup`` prints JSON.
+
+``import_s`` is the time to import ``backend.api.main``; ``startup_s``
+adds the lifespan startup and the first ``GET /health``. Run it with a
+``REDIS_URL`` nothing listens on: startup must not need Redis.
+"""
+import asyncio
+import json
+import time
+
+async def first_request(app):
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+
+def main():
+    start = time.perf_counter()
+    from backend.api.main import app
+    imported = time.perf_counter()
+    asyncio.run(first_request(app))
+    ready = time.perf_counter()
+    print(json.dumps({"import_s": imported - start, "startup_s": ready - start}))
+
+if __name__ == "__main__":
+    main()
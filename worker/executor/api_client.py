@@ -0,0 +1,175 @@
+"""HTTP client the executor uses to talk to the API.
+
+All calls share one keep-alive connection pool with connect/read timeouts
+and retries with exponential backoff (honouring ``Retry-After``), so a
+restarting API replica neither hangs a worker nor gets hammered by it.
+
+Job status updates are coalesced by ``StatusBatcher``: updates to the same
+job merge, and everything pending goes out as one bulk PATCH per flush
+interval.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Statuses written immediately instead of waiting for the next flush
+URGENT_STATUSES = ("queued", "completed", "failed", "cancelled")
+
+def rejected(error: requests.HTTPError) -> bool:
+    """A 4xx other than 429: the same request will fail again."""
+    status = error.response.status_code if error.response is not None else None
+    return status is not None and 400 <= status < 500 and status != 429
+
+class ApiClient:
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        retries: int = 5,
+        backoff: float = 0.5,
+        pool_size: int = 10
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 502, 503, 504),
+            # Every executor call is idempotent, PATCH and POST included
+            allowed_methods=frozenset({"GET", "PATCH", "POST", "DELETE"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, f"{self.base_url}{path}", **kwargs)
+
+    def get_job(self, job_id: str) -> dict:
+        response = self.request("GET", f"/api/jobs/{job_id}")
+        response.raise_for_status()
+        return response.json()
+
+    def update_jobs(self, updates: Dict[str, dict]):
+        """Apply ``{job_id: fields}`` in one request."""
+        response = self.request(
+            "PATCH",
+            "/api/jobs/batch",
+            json=[{"id": job_id, **fields} for job_id, fields in updates.items()]
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+class StatusBatcher:
+    """Coalesces job status updates into one bulk PATCH per ``flush_interval``.
+
+    Failed flushes keep their updates (newer fields win when merged) and
+    back off exponentially with jitter up to ``max_backoff`` seconds.
+    """
+
+    def __init__(self, client: ApiClient, flush_interval: float = 1.0, max_backoff: float = 60.0):
+        self.client = client
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._failures = 0
+        self._thread = threading.Thread(target=self._run, name="status-batcher", daemon=True)
+        self._thread.start()
+
+    def update(self, job_id: str, urgent: bool = False, **fields):
+        """Queue ``fields`` for a job; ``urgent`` flushes before returning."""
+        with self._lock:
+            self._pending.setdefault(job_id, {}).update(fields)
+        if urgent:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Send everything pending now. Returns False if the API call failed."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return True
+            try:
+                self.client.update_jobs(batch)
+            except requests.HTTPError as e:
+                if rejected(e) and len(batch) > 1:
+                    # One bad update must not take the other jobs' updates with it
+                    return self._send_each(batch)
+                if rejected(e):
+                    # Retrying a rejected update would never succeed
+                    logger.error(f"API rejected the update of job {next(iter(batch))}: {str(e)}")
+                    return True
+                return self._keep(batch, e)
+            except requests.RequestException as e:
+                return self._keep(batch, e)
+            self._failures = 0
+            return True
+
+    def _send_each(self, batch: Dict[str, dict]) -> bool:
+        """Send a rejected batch one job at a time, dropping only rejected updates."""
+        failed, error = {}, None
+        for job_id, fields in batch.items():
+            try:
+                self.client.update_jobs({job_id: fields})
+            except requests.HTTPError as e:
+                if rejected(e):
+                    logger.error(f"API rejected the update of job {job_id}: {str(e)}")
+                else:
+                    failed[job_id], error = fields, e
+            except requests.RequestException as e:
+                failed[job_id], error = fields, e
+        if failed:
+            return self._keep(failed, error)
+        self._failures = 0
+        return True
+
+    def _keep(self, batch: Dict[str, dict], error: Exception) -> bool:
+        """Put a failed batch back under any newer updates."""
+        logger.error(f"Failed to send {len(batch)} job updates: {str(error)}")
+        with self._lock:
+            for job_id, fields in batch.items():
+                self._pending[job_id] = {**fields, **self._pending.get(job_id, {})}
+        self._failures += 1
+        return False
+
+    def close(self, timeout: float = 30.0):
+        """Flush what is left, retrying until ``timeout`` passes."""
+        deadline = time.monotonic() + timeout
+        while not self.flush() and time.monotonic() < deadline:
+            time.sleep(min(self._backoff(), max(0.0, deadline - time.monotonic())))
+
+    def _backoff(self) -> float:
+        if not self._failures:
+            return self.flush_interval
+        delay = min(self.max_backoff, self.flush_interval * 2 ** self._failures)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self):
+        while True:
+            time.sleep(self._backoff())
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Status batcher error: {str(e)}")
@@ -0,0 +1,29 @@
+"""Checkpoint discovery for resuming jobs.
+
+Training scripts write ``checkpoints/checkpoint_step_<N>.pt`` atomically
+(temporary file, then rename). ``torch.save`` produces a zip archive, so a
+file truncated by a crash fails ``zipfile.is_zipfile`` and is skipped
+without having to import torch in the executor.
+"""
+import re
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+CHECKPOINT_PATTERN = re.compile(r"^checkpoint_step_(\d+)\.pt$")
+
+def latest_checkpoint(checkpoint_dir: Path) -> Optional[Path]:
+    """Newest complete checkpoint in ``checkpoint_dir``, if any."""
+    if not checkpoint_dir.is_dir():
+        return None
+
+    candidates = []
+    for path in checkpoint_dir.iterdir():
+        match = CHECKPOINT_PATTERN.match(path.name)
+        if match:
+            candidates.append((int(match.group(1)), path))
+
+    for _, path in sorted(candidates, reverse=True):
+        if zipfile.is_zipfile(path):
+            return path
+    return None
@@ -0,0 +1,239 @@
+"""Content-addressed cache of datasets and pretrained weights.
+
+Entries are directory trees stored once under ``objects/<sha256>`` on the
+shared data volume; ``refs/<name>`` maps a logical name such as
+``datasets/cifar10`` to the digest of its current contents. Jobs get a
+symlink into the cache instead of a private download.
+
+All executor processes on the volume coordinate through ``flock``: one
+lock per name serializes fetches, and one lock on ``index.json`` guards
+sizes, last-use times, pins and hit/miss counters. When the cache grows
+past its byte budget, least recently used objects that no running job has
+pinned are evicted.
+
+A miss is filled from ``seed_dir/<name>`` when present, so a cache can be
+populated fully offline from a local copy.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/data/cache"
+DEFAULT_BUDGET_GB = 100
+
+# Pins older than this belong to a crashed worker and no longer block eviction
+PIN_TTL_SECONDS = 7 * 24 * 3600
+
+class DataCacheError(Exception):
+    pass
+
+def entry_path(root: Path, name: str) -> Path:
+    """``root / name`` for a cache name, refusing names that leave ``root``.
+
+    Names come from job configs. The check is on the normalized name, so
+    symlinks an operator placed under ``root`` keep working.
+    """
+    relative = os.path.normpath(name)
+    if os.path.isabs(relative) or relative == "." or relative.split(os.sep)[0] == "..":
+        raise DataCacheError(f"Invalid cache entry name: {name!r}")
+    return root / relative
+
+def tree_digest(path: Path) -> str:
+    """SHA-256 over the relative paths, sizes and contents of all files."""
+    digest = hashlib.sha256()
+    for file in sorted(p for p in path.rglob("*") if p.is_file()):
+        rel = file.relative_to(path).as_posix()
+        digest.update(f"{rel}\0{file.stat().st_size}\0".encode())
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def tree_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+def copy_tree(src: Path, dst: Path):
+    """Copy ``src`` into ``dst``, hard-linking files on the same filesystem."""
+    def link_or_copy(s, d):
+        try:
+            os.link(s, d)
+        except OSError:
+            shutil.copy2(s, d)
+    shutil.copytree(src, dst, copy_function=link_or_copy, dirs_exist_ok=True)
+
+@contextmanager
+def file_lock(path: Path):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class DataCache:
+    def __init__(
+        self,
+        root: str = DEFAULT_CACHE_DIR,
+        budget_bytes: int = DEFAULT_BUDGET_GB * 1024 ** 3,
+        seed_dir: Optional[str] = None,
+        offline: bool = False
+    ):
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.seed_dir = Path(seed_dir) if seed_dir else None
+        self.offline = offline
+
+        self.objects_dir = self.root / "objects"
+        self.refs_dir = self.root / "refs"
+        self.tmp_dir = self.root / "tmp"
+        self.locks_dir = self.root / "locks"
+        for directory in (self.objects_dir, self.refs_dir, self.tmp_dir, self.locks_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+
+    def ensure(self, name: str, fetch: Optional[Callable[[Path], None]] = None, job_id: Optional[str] = None) -> Path:
+        """Path of the cached tree for ``name``, fetching it on a miss.
+
+        ``fetch(directory)`` downloads the entry into an empty directory.
+        If ``job_id`` is given the object is pinned until ``release(job_id)``.
+        """
+        lock_name = hashlib.sha1(name.encode()).hexdigest()
+        with file_lock(self.locks_dir / f"{lock_name}.lock"):
+            digest = self._read_ref(name)
+            if digest:
+                with self._index() as index:
+                    entry = index["objects"].get(digest)
+                    if entry and (self.objects_dir / digest).is_dir():
+                        self._use(index, digest, job_id)
+                        index["stats"]["hits"] += 1
+                        return self.objects_dir / digest
+
+            digest, size = self._fill(name, fetch)
+            self._write_ref(name, digest)
+            with self._index() as index:
+                index["objects"].setdefault(digest, {"size": size, "pins": {}})
+                self._use(index, digest, job_id)
+                index["stats"]["misses"] += 1
+                self._evict(index, keep=digest)
+            return self.objects_dir / digest
+
+    def release(self, job_id: str):
+        """Unpin every object used by a finished job."""
+        with self._index() as index:
+            for entry in index["objects"].values():
+                entry["pins"].pop(job_id, None)
+
+    def stats(self) -> dict:
+        with self._index() as index:
+            return {
+                **index["stats"],
+                "objects": len(index["objects"]),
+                "size_bytes": sum(e["size"] for e in index["objects"].values()),
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def _fill(self, name: str, fetch: Optional[Callable[[Path], None]]):
+        tmp = Path(tempfile.mkdtemp(dir=self.tmp_dir))
+        try:
+            seed = entry_path(self.seed_dir, name) if self.seed_dir else None
+            if seed and seed.is_dir():
+                copy_tree(seed, tmp)
+            elif self.offline or fetch is None:
+                raise DataCacheError(f"{name} is not cached and cannot be fetched offline")
+            else:
+                logger.info(f"Fetching {name} into the data cache")
+                fetch(tmp)
+
+            digest = tree_digest(tmp)
+            size = tree_size(tmp)
+            target = self.objects_dir / digest
+            if target.is_dir():
+                # Same content under another name; keep one copy
+                shutil.rmtree(tmp)
+            else:
+                os.rename(tmp, target)
+            return digest, size
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def _use(self, index: dict, digest: str, job_id: Optional[str]):
+        entry = index["objects"][digest]
+        entry["last_used"] = time.time()
+        if job_id:
+            entry["pins"][job_id] = time.time()
+
+    def _evict(self, index: dict, keep: str):
+        now = time.time()
+        objects = index["objects"]
+        total = sum(entry["size"] for entry in objects.values())
+        candidates = sorted(
+            (entry["last_used"], digest) for digest, entry in objects.items()
+            if digest != keep and not any(now - t < PIN_TTL_SECONDS for t in entry["pins"].values())
+        )
+        for _, digest in candidates:
+            if total <= self.budget_bytes:
+                break
+            total -= objects.pop(digest)["size"]
+            shutil.rmtree(self.objects_dir / digest, ignore_errors=True)
+            index["stats"]["evictions"] += 1
+            logger.info(f"Evicted {digest} from the data cache")
+
+    def _read_ref(self, name: str) -> Optional[str]:
+        try:
+            return entry_path(self.refs_dir, name).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def _write_ref(self, name: str, digest: str):
+        ref = entry_path(self.refs_dir, name)
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ref.with_name(f".{ref.name}.tmp")
+        tmp.write_text(digest)
+        os.replace(tmp, ref)
+
+    @contextmanager
+    def _index(self):
+        """Read-modify-write the index under its lock."""
+        with file_lock(self.root / "index.lock"):
+            try:
+                index = json.loads(self.index_path.read_text())
+            except FileNotFoundError:
+                index = {"objects": {}, "stats": {"hits": 0, "misses": 0, "evictions": 0}}
+            yield index
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(index))
+            os.replace(tmp, self.index_path)
+
+def fetch_dataset(dataset: str) -> Callable[[Path], None]:
+    """Downloader for a dataset supported by the training templates."""
+    def fetch(directory: Path):
+        from torchvision import datasets
+
+        if dataset == "cifar10":
+            datasets.CIFAR10(root=str(directory), train=True, download=True)
+        else:
+            raise DataCacheError(f"Unknown dataset: {dataset}")
+    return fetch
+
+def fetch_weights(model: str) -> Callable[[Path], None]:
+    """Downloader laying out default torchvision weights as a ``TORCH_HOME``."""
+    def fetch(directory: Path):
+        import torch
+        from torchvision import models
+
+        weights = models.get_model_weights(model).DEFAULT
+        checkpoints = directory / "hub" / "checkpoints"
+        checkpoints.mkdir(parents=True)
+        torch.hub.download_url_to_file(weights.url, str(checkpoints / os.path.basename(weights.url)))
+    return fetch
@@ -0,0 +1,106 @@
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import redis
+
+from backend.core.job_logs import LOG_STREAM_MAXLEN, LOG_STREAM_TTL_SECONDS, log_stream_key
+
+logger = logging.getLogger(__name__)
+
+class JobLog:
+    """Streams a job's output to a rotating file, a Redis stream and a tail buffer.
+
+    Lines are read by a background thread straight from the process pipe,
+    so memory use is bounded by ``tail_lines`` and the pending Redis batch
+    regardless of how much the job prints.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        log_dir: Path,
+        redis_client,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 3,
+        tail_lines: int = 200,
+        max_line_length: int = 16384
+    ):
+        self.job_id = job_id
+        self.redis = redis_client
+        self.stream_key = log_stream_key(job_id)
+        self.max_line_length = max_line_length
+        self.tail = deque(maxlen=tail_lines)
+        self.bytes_written = 0
+
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self._handler = RotatingFileHandler(
+            log_dir / "job.log",
+            maxBytes=max_bytes,
+            backupCount=backup_count
+        )
+        # Written through the handler directly: a logger per job would stay
+        # in the logging registry for the life of the executor
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def follow(self, stream):
+        """Start draining a text pipe in a background thread."""
+        self._reader = threading.Thread(
+            target=self._read,
+            args=(stream,),
+            name=f"log-{self.job_id}",
+            daemon=True
+        )
+        self._reader.start()
+
+    def _read(self, stream):
+        for line in iter(lambda: stream.readline(self.max_line_length), ""):
+            line = line.rstrip("\r\n")
+            self.bytes_written += len(line) + 1
+            self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+            with self._lock:
+                self.tail.append(line)
+                self._pending.append(line)
+        stream.close()
+
+    def flush(self):
+        """Ship buffered lines to the Redis stream in one pipeline."""
+        with self._lock:
+            lines, self._pending = self._pending, []
+        if not lines:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for line in lines:
+                pipe.xadd(self.stream_key, {"line": line}, maxlen=LOG_STREAM_MAXLEN, approximate=True)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Dropped {len(lines)} log lines for job {self.job_id}: {str(e)}")
+
+    def close(self):
+        """Wait for the pipe to drain, flush and mark the end of the log."""
+        if self._reader:
+            self._reader.join(timeout=30)
+        self.flush()
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.xadd(self.stream_key, {"eof": 1}, maxlen=LOG_STREAM_MAXLEN, approximate=True)
+            pipe.expire(self.stream_key, LOG_STREAM_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not finalize log stream for job {self.job_id}: {str(e)}")
+
+        self._handler.close()
+
+    def tail_text(self, max_chars: int = 8000) -> str:
+        """Last lines of output, truncated to ``max_chars`` from the end."""
+        with self._lock:
+            text = "\n".join(self.tail)
+        return text[-max_chars:]
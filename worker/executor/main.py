@@ -1,6 +1,10 @@
 import os
 import sys
 import json
+import time
+import signal
+import socket
+import threading
 import subprocess
 import logging
 from pathlib import Path
@@ -11,9 +15,34 @@ import requests
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from backend.core.job_queue import JobQueue
+from backend.core.metrics import serve as serve_metrics
+from backend.core.scheduler import Scheduler
+from executor import metrics
+from executor.api_client import URGENT_STATUSES, ApiClient, StatusBatcher
+from executor.checkpoints import latest_checkpoint
+from executor.data_cache import DataCache, fetch_dataset, fetch_weights
+from executor.job_logs import JobLog
+from executor.preprocess import fetch_preprocessed, preprocessed_name
+from executor.templates import TemplateRegistry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def detect_gpu_count() -> int:
+    """Number of GPUs visible through nvidia-smi, 0 on CPU-only hosts."""
+    try:
+        result = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return 0
+    if result.returncode != 0:
+        return 0
+    return sum(1 for line in result.stdout.splitlines() if line.startswith("GPU "))
+
+def detect_memory_gb() -> int:
+    """Physical memory of the host in GB."""
+    return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3)
+
 class JobExecutor:
     def __init__(self):
         self.redis_client = redis.Redis(
@@ -22,26 +51,218 @@ class JobExecutor:
             decode_responses=True
         )
         self.api_url = os.getenv("API_URL", "http://backend:8000")
+        # Pooled API connections; status updates are sent in coalesced batches
+        self.api = ApiClient(
+            self.api_url,
+            connect_timeout=float(os.getenv("API_CONNECT_TIMEOUT", 3)),
+            read_timeout=float(os.getenv("API_READ_TIMEOUT", 10)),
+            retries=int(os.getenv("API_RETRIES", 5)),
+            pool_size=int(os.getenv("API_POOL_SIZE", 10))
+        )
+        self.status_updates = StatusBatcher(
+            self.api,
+            flush_interval=float(os.getenv("STATUS_FLUSH_INTERVAL", 1.0))
+        )
         self.workspace = Path("/workspace/jobs")
         self.workspace.mkdir(parents=True, exist_ok=True)
+        self.templates = TemplateRegistry(os.getenv("TEMPLATE_DIR", "/workspace/templates"))
+        
+        # Datasets and pretrained weights shared by all jobs on the data volume
+        self.data_cache = DataCache(
+            os.getenv("DATA_CACHE_DIR", "/data/cache"),
+            budget_bytes=int(float(os.getenv("DATA_CACHE_MAX_GB", 100)) * 1024 ** 3),
+            seed_dir=os.getenv("DATA_CACHE_SEED_DIR"),
+            offline=os.getenv("DATA_CACHE_OFFLINE", "0") == "1"
+        )
+        # Preprocess datasets once into memory-mapped shards for the input pipeline
+        self.preprocess_datasets = os.getenv("PREPROCESS_DATASETS", "1") == "1"
+        
+        self.worker_id = os.getenv("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+        self.queue = JobQueue(
+            self.redis_client,
+            lease_seconds=int(os.getenv("JOB_LEASE_SECONDS", 60))
+        )
+        self.reap_interval = float(os.getenv("JOB_REAP_INTERVAL", 15))
+        self.scheduler = Scheduler(
+            self.queue,
+            aging_seconds=float(os.getenv("SCHEDULER_AGING_SECONDS", 300)),
+            starvation_seconds=float(os.getenv("SCHEDULER_STARVATION_SECONDS", 1800))
+        )
+        
+        # Capacity advertised to the scheduler
+        self.gpu_total = int(os.getenv("WORKER_GPU_COUNT", detect_gpu_count()))
+        self.memory_total = int(os.getenv("WORKER_MEMORY_GB", detect_memory_gb()))
+        self.cpu_total = int(os.getenv("WORKER_CPU_COUNT", os.cpu_count() or 1))
+        
+        # Concurrent jobs per executor process
+        self.slots = max(1, int(os.getenv("EXECUTOR_SLOTS", 1)))
+        self.cancel_check_interval = float(os.getenv("JOB_CANCEL_CHECK_INTERVAL", 10))
+        self.kill_grace_seconds = float(os.getenv("JOB_KILL_GRACE_SECONDS", 10))
+        # Failed runs handed back to the queue to resume from their last checkpoint
+        self.max_retries = int(os.getenv("JOB_MAX_RETRIES", 2))
+        
+        # Job output streaming
+        self.log_max_bytes = int(os.getenv("JOB_LOG_MAX_BYTES", 50 * 1024 * 1024))
+        self.log_backups = int(os.getenv("JOB_LOG_BACKUPS", 3))
+        self.log_tail_chars = int(os.getenv("JOB_LOG_TAIL_CHARS", 8000))
+        
+        # job_id -> resources ({"gpu_count", "memory_gb"}) of running jobs
+        self.active_jobs = {}
+        # Jobs whose lease was lost (cancelled or reaped) and must be stopped
+        self.revoked_jobs = set()
+        # GPU indices not assigned to a running job; job_id -> assigned indices
+        self.free_gpus = list(range(self.gpu_total))
+        self.job_gpus = {}
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Event()
+        self._last_reap = 0.0
+        
+        # Prometheus-style exporter; 0 disables it
+        self.metrics_port = int(os.getenv("WORKER_METRICS_PORT", 9100))
+        metrics.jobs_running.set_function(lambda: {(): len(self.active_jobs)})
+        metrics.gpus_in_use.set_function(lambda: {(): self.used_capacity()[0]})
+    
+    def used_capacity(self):
+        with self._lock:
+            jobs = list(self.active_jobs.values())
+        gpus = sum(job.get("gpu_count", 0) for job in jobs)
+        memory = sum(job.get("memory_gb", 0) for job in jobs)
+        return gpus, memory
     
     def poll_jobs(self):
-        """Poll Redis queue for new jobs."""
+        """Poll the shared queue for jobs that fit this worker."""
+        logger.info(
+            f"Worker {self.worker_id}: {self.gpu_total} GPUs, {self.memory_total} GB memory, "
+            f"{self.slots} slots"
+        )
+        self.advertise_capacity()
+        if self.metrics_port:
+            serve_metrics(metrics.registry, self.metrics_port)
+        heartbeat = threading.Thread(target=self.heartbeat_loop, daemon=True)
+        heartbeat.start()
+        
+        try:
+            while True:
+                self.reap_expired_leases()
+                
+                if len(self.active_jobs) >= self.slots:
+                    self._slot_freed.wait(timeout=5)
+                    self._slot_freed.clear()
+                    continue
+                
+                # The job stays leased to us until acked
+                gpus_used, memory_used = self.used_capacity()
+                job_id = self.scheduler.next_job(
+                    self.worker_id,
+                    free_gpus=self.gpu_total - gpus_used,
+                    free_memory=self.memory_total - memory_used,
+                    total_gpus=self.gpu_total,
+                    total_memory=self.memory_total,
+                    timeout=5
+                )
+                
+                if job_id:
+                    logger.info(f"Received job: {job_id}")
+                    self.start_job(job_id)
+        finally:
+            self.scheduler.registry.deregister(self.worker_id)
+            self.status_updates.close()
+            self.api.close()
+    
+    def start_job(self, job_id: str):
+        """Run a leased job in its own supervisor thread."""
+        with self._lock:
+            meta = self.queue.pending_meta(job_id)
+            self.active_jobs[job_id] = meta
+            gpu_count = min(meta.get("gpu_count", 0), len(self.free_gpus))
+            self.job_gpus[job_id] = self.free_gpus[:gpu_count]
+            del self.free_gpus[:gpu_count]
+        self.advertise_capacity()
+        
+        supervisor = threading.Thread(
+            target=self.run_job,
+            args=(job_id,),
+            name=f"job-{job_id}",
+            daemon=True
+        )
+        supervisor.start()
+    
+    def run_job(self, job_id: str):
+        started = time.monotonic()
+        outcome = "failed"
+        try:
+            outcome = self.execute_job(job_id)
+        finally:
+            metrics.jobs_finished.labels(outcome).inc()
+            metrics.job_duration.labels(outcome).observe(time.monotonic() - started)
+            with self._lock:
+                self.active_jobs.pop(job_id, None)
+                revoked = job_id in self.revoked_jobs
+                self.revoked_jobs.discard(job_id)
+                self.free_gpus.extend(self.job_gpus.pop(job_id, []))
+            try:
+                self.data_cache.release(job_id)
+            except OSError as e:
+                logger.error(f"Failed to unpin cached data of job {job_id}: {str(e)}")
+            try:
+                # A revoked job was requeued or cancelled behind our back
+                if outcome != "requeued" and not revoked:
+                    if not self.queue.ack(job_id, self.worker_id):
+                        logger.warning(f"Lease on job {job_id} was gone at ack")
+                self.advertise_capacity()
+            except redis.RedisError as e:
+                logger.error(f"Failed to release job {job_id}: {str(e)}")
+            self._slot_freed.set()
+    
+    def advertise_capacity(self):
+        """Publish total and used capacity to the worker registry."""
+        gpus_used, memory_used = self.used_capacity()
+        self.scheduler.registry.heartbeat(
+            self.worker_id,
+            gpu_total=self.gpu_total,
+            memory_total=self.memory_total,
+            gpu_used=gpus_used,
+            memory_used=memory_used,
+            running=len(self.active_jobs)
+        )
+    
+    def heartbeat_loop(self):
+        """Keep leases of running jobs and the worker registration alive."""
+        interval = max(1.0, min(self.queue.lease_seconds, self.scheduler.registry.ttl) / 3)
         while True:
-            # Blocking pop from queue
-            job_data = self.redis_client.blpop("job_queue", timeout=5)
-            
-            if job_data:
-                _, job_id = job_data
-                logger.info(f"Received job: {job_id}")
-                self.execute_job(job_id)
+            time.sleep(interval)
+            try:
+                self.advertise_capacity()
+            except redis.RedisError as e:
+                logger.error(f"Capacity heartbeat failed: {str(e)}")
+            for job_id in list(self.active_jobs):
+                try:
+                    if not self.queue.heartbeat(job_id, self.worker_id):
+                        logger.warning(f"Lost lease on job {job_id}, stopping it")
+                        with self._lock:
+                            self.revoked_jobs.add(job_id)
+                except redis.RedisError as e:
+                    logger.error(f"Heartbeat failed for job {job_id}: {str(e)}")
     
-    def execute_job(self, job_id: str):
-        """Execute a training job."""
+    def reap_expired_leases(self):
+        """Requeue jobs whose worker stopped heartbeating."""
+        now = time.monotonic()
+        if now - self._last_reap < self.reap_interval:
+            return
+        self._last_reap = now
+        
+        for job_id in self.queue.reap_expired():
+            logger.warning(f"Requeued job {job_id} after lease expiry")
+    
+    def execute_job(self, job_id: str) -> str:
+        """Execute a training job.
+
+        Returns the outcome: completed, failed, cancelled, or requeued if
+        the job was handed back to the queue for a retry.
+        """
         try:
             # Fetch job details from API
-            response = requests.get(f"{self.api_url}/api/jobs/{job_id}")
-            job_data = response.json()
+            job_data = self.api.get_job(job_id)
             
             # Update status to running
             self.update_job_status(job_id, "running", started_at=datetime.utcnow().isoformat())
@@ -58,16 +279,62 @@ class JobExecutor:
             # Generate training script from template
             script_path = self.generate_training_script(job_data, job_dir)
             
-            # Execute training
+            # Execute training on the GPUs assigned to this job
+            env = os.environ.copy()
+            env.update(self.prepare_data(job_id, job_data['config'], job_dir))
+            gpus = self.job_gpus.get(job_id, [])
+            env["CUDA_VISIBLE_DEVICES"] = ",".join(str(i) for i in gpus)
+            distributed = job_data['config'].get('distributed') or {}
+            nproc = distributed.get('processes') or max(1, len(gpus))
+            if gpus:
+                # One device per rank; the API rejects more, older jobs are capped
+                nproc = min(nproc, len(gpus))
+            if distributed.get('backend'):
+                env["NEXUS_DIST_BACKEND"] = distributed['backend']
+            # Per-rank CPU and memory shares the script tunes its performance profile to
+            cpus = max(1, self.cpu_total // self.slots // nproc)
+            memory_gb = self.active_jobs.get(job_id, {}).get("memory_gb", self.memory_total)
+            env["NEXUS_CPU_COUNT"] = str(cpus)
+            env["NEXUS_MEMORY_GB"] = str(max(1, memory_gb // nproc))
+            env["OMP_NUM_THREADS"] = str(cpus)
+            
+            # Pick up where a failed or preempted run left off
+            checkpoint = latest_checkpoint(job_dir / "checkpoints")
+            if checkpoint:
+                logger.info(f"Resuming job {job_id} from {checkpoint.name}")
+                env["NEXUS_RESUME_FROM"] = str(checkpoint)
+            
             logger.info(f"Starting training for job {job_id}")
-            result = subprocess.run(
-                [sys.executable, str(script_path)],
+            process = subprocess.Popen(
+                self.launch_command(script_path, nproc),
                 cwd=job_dir,
-                capture_output=True,
-                text=True
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                start_new_session=True
+            )
+            
+            # Stream output line by line instead of buffering it all
+            job_log = JobLog(
+                job_id,
+                job_dir / "logs",
+                self.redis_client,
+                max_bytes=self.log_max_bytes,
+                backup_count=self.log_backups
             )
+            job_log.follow(process.stdout)
+            try:
+                returncode = self.supervise(job_id, process, job_log)
+            finally:
+                job_log.close()
+                metrics.job_log_bytes.inc(job_log.bytes_written)
             
-            if result.returncode == 0:
+            if returncode is None:
+                logger.info(f"Job {job_id} was cancelled")
+                return "cancelled"
+            elif returncode == 0:
                 logger.info(f"Job {job_id} completed successfully")
                 self.update_job_status(
                     job_id,
@@ -75,13 +342,18 @@ class JobExecutor:
                     completed_at=datetime.utcnow().isoformat(),
                     output_path=str(job_dir / "output")
                 )
+                return "completed"
             else:
-                logger.error(f"Job {job_id} failed: {result.stderr}")
+                # Only a bounded tail of the output goes into the job row
+                error_tail = job_log.tail_text(self.log_tail_chars)
+                logger.error(f"Job {job_id} failed with exit code {returncode}")
+                if self.retry_job(job_id, f"Exit code {returncode}"):
+                    return "requeued"
                 self.update_job_status(
                     job_id,
                     "failed",
                     completed_at=datetime.utcnow().isoformat(),
-                    error_message=result.stderr
+                    error_message=f"Exit code {returncode}\n{error_tail}"
                 )
         
         except Exception as e:
@@ -92,26 +364,113 @@ class JobExecutor:
                 completed_at=datetime.utcnow().isoformat(),
                 error_message=str(e)
             )
+        return "failed"
+    
+    def retry_job(self, job_id: str, reason: str) -> bool:
+        """Requeue a failed job unless it has used up its retries."""
+        attempts = self.queue.record_attempt(job_id)
+        if attempts > self.max_retries:
+            return False
+        
+        logger.warning(f"Requeueing job {job_id} (retry {attempts}/{self.max_retries})")
+        # Status first, so a worker that claims it right away is not overwritten
+        self.update_job_status(
+            job_id,
+            "queued",
+            error_message=f"{reason}; retry {attempts}/{self.max_retries} resumes from the last checkpoint"
+        )
+        self.queue.requeue(job_id)
+        return True
+    
+    def supervise(self, job_id: str, process: subprocess.Popen, job_log: JobLog):
+        """Wait for a training process, stopping it if the job is cancelled.
+
+        Returns the exit code, or None if the job was cancelled.
+        """
+        last_check = time.monotonic()
+        while True:
+            try:
+                return process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass
+            finally:
+                job_log.flush()
+            
+            if job_id in self.revoked_jobs:
+                self.terminate(process)
+                return None
+            
+            if time.monotonic() - last_check >= self.cancel_check_interval:
+                last_check = time.monotonic()
+                if self.is_cancelled(job_id):
+                    self.terminate(process)
+                    return None
+    
+    def is_cancelled(self, job_id: str) -> bool:
+        try:
+            return self.api.get_job(job_id).get("status") == "cancelled"
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Could not check status of job {job_id}: {str(e)}")
+            return False
+    
+    def terminate(self, process: subprocess.Popen):
+        """Stop a training process group: SIGTERM, then SIGKILL after a grace period."""
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=self.kill_grace_seconds)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        except ProcessLookupError:
+            pass
+    
+    def launch_command(self, script_path: Path, nproc: int) -> list:
+        """Single process, or one rank per process through torchrun."""
+        if nproc <= 1:
+            return [sys.executable, str(script_path)]
+        # --standalone runs a local rendezvous on a free port, so concurrent
+        # jobs on one worker do not collide
+        return [
+            sys.executable, "-m", "torch.distributed.run",
+            "--standalone",
+            f"--nproc_per_node={nproc}",
+            str(script_path)
+        ]
+    
+    def prepare_data(self, job_id: str, config: dict, job_dir: Path) -> dict:
+        """Link cached datasets and weights into the job; returns env vars for the script."""
+        data_dir = self.data_cache.ensure(
+            f"datasets/{config['dataset']}",
+            fetch_dataset(config['dataset']),
+            job_id=job_id
+        )
+        link = job_dir / "data"
+        if link.is_symlink():
+            link.unlink()
+        if not link.exists():
+            link.symlink_to(data_dir, target_is_directory=True)
+        env = {"NEXUS_DATA_DIR": str(link)}
+        
+        if self.preprocess_datasets:
+            env["NEXUS_PREPROCESSED_DIR"] = str(self.data_cache.ensure(
+                preprocessed_name(config['dataset']),
+                fetch_preprocessed(config['dataset'], data_dir),
+                job_id=job_id
+            ))
+        
+        if config.get("pretrained"):
+            env["TORCH_HOME"] = str(self.data_cache.ensure(
+                f"weights/{config['model']}",
+                fetch_weights(config['model']),
+                job_id=job_id
+            ))
+        
+        logger.info(f"Data cache: {self.data_cache.stats()}")
+        return env
     
     def generate_training_script(self, job_data: dict, job_dir: Path) -> Path:
         """Generate training script from template."""
-        config = job_data['config']
-        
-        # Load template
-        template_path = Path("/workspace/templates/pytorch_template.py")
-        with open(template_path, 'r') as f:
-            template = f.read()
-        
-        # Fill in config values
-        script_content = template.format(
-            model=config['model'],
-            dataset=config['dataset'],
-            epochs=config['epochs'],
-            batch_size=config['batch_size'],
-            learning_rate=config['learning_rate'],
-            optimizer=config['optimizer'],
-            job_id=job_data['id']
-        )
+        script_content = self.templates.render(job_data['config'], job_data['id'])
         
         # Write script
         script_path = job_dir / "train.py"
@@ -121,12 +480,12 @@ class JobExecutor:
         return script_path
     
     def update_job_status(self, job_id: str, status: str, **kwargs):
-        """Update job status via API."""
-        update_data = {"status": status, **kwargs}
-        requests.patch(
-            f"{self.api_url}/api/jobs/{job_id}",
-            json=update_data
-        )
+        """Update job status via API.
+
+        Progress updates go out with the next batch; requeues and final
+        statuses are sent before returning.
+        """
+        self.status_updates.update(job_id, urgent=status in URGENT_STATUSES, status=status, **kwargs)
 
 if __name__ == "__main__":
     executor = JobExecutor()
@@ -0,0 +1,21 @@
+"""Worker counters, exported in Prometheus text format by ``backend.core.metrics.serve``."""
+from backend.core.metrics import Registry
+
+registry = Registry()
+
+jobs_running = registry.gauge(
+    "worker_jobs_running", "Jobs running on this worker."
+)
+gpus_in_use = registry.gauge(
+    "worker_gpus_in_use", "GPUs assigned to running jobs."
+)
+jobs_finished = registry.counter(
+    "worker_jobs_finished", "Job runs by outcome.", ("outcome",)
+)
+job_duration = registry.histogram(
+    "worker_job_duration_seconds", "Wall time of job runs, setup included.", ("outcome",),
+    buckets=(10, 30, 60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+)
+job_log_bytes = registry.counter(
+    "worker_job_log_bytes", "Bytes of job output written to job logs."
+)
@@ -0,0 +1,82 @@
+"""One-time preprocessing of datasets into memory-mapped uint8 shards.
+
+The deterministic part of the training transforms (resize and center crop)
+is applied once and the result is written as raw ``uint8`` arrays of shape
+``(count, 3, size, size)``, one file per shard, plus ``labels.npy`` and an
+``index.json`` describing the layout. Training scripts map the shards and
+only do random augmentation and normalization per step.
+
+Preprocessed trees are stored in the data cache like any other entry, so
+each worker preprocesses a dataset at most once.
+"""
+import json
+from pathlib import Path
+from typing import Callable
+
+# Bump when the on-disk layout or the deterministic transforms change
+PREPROCESS_VERSION = 1
+
+DEFAULT_RESIZE = 256
+DEFAULT_IMAGE_SIZE = 224
+DEFAULT_SHARD_SIZE = 10000
+
+def preprocessed_name(dataset: str, resize: int = DEFAULT_RESIZE, image_size: int = DEFAULT_IMAGE_SIZE) -> str:
+    return f"preprocessed/{dataset}-r{resize}-c{image_size}-v{PREPROCESS_VERSION}"
+
+def preprocess_dataset(
+    dataset: str,
+    raw_dir: Path,
+    out_dir: Path,
+    resize: int = DEFAULT_RESIZE,
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    shard_size: int = DEFAULT_SHARD_SIZE
+):
+    import numpy as np
+    from torchvision import datasets, transforms
+
+    transform = transforms.Compose([
+        transforms.Resize(resize),
+        transforms.CenterCrop(image_size),
+    ])
+    if dataset == "cifar10":
+        source = datasets.CIFAR10(root=str(raw_dir), train=True, download=False, transform=transform)
+    else:
+        raise ValueError(f"Unknown dataset: {dataset}")
+
+    shape = (3, image_size, image_size)
+    count = len(source)
+    labels = np.empty(count, dtype=np.int64)
+    shards = []
+
+    for start in range(0, count, shard_size):
+        n = min(shard_size, count - start)
+        name = f"shard_{len(shards):04d}.u8"
+        images = np.memmap(out_dir / name, dtype=np.uint8, mode="w+", shape=(n,) + shape)
+        for offset in range(n):
+            image, label = source[start + offset]
+            # PIL HWC -> CHW, as the training loop expects
+            images[offset] = np.asarray(image.convert("RGB"), dtype=np.uint8).transpose(2, 0, 1)
+            labels[start + offset] = label
+        images.flush()
+        del images
+        shards.append({"images": name, "count": n})
+
+    np.save(out_dir / "labels.npy", labels)
+    with open(out_dir / "index.json", "w") as f:
+        json.dump({
+            "version": PREPROCESS_VERSION,
+            "dataset": dataset,
+            "dtype": "uint8",
+            "shape": list(shape),
+            "count": count,
+            "shard_size": shard_size,
+            "shards": shards,
+            "labels": "labels.npy",
+            "transforms": {"resize": resize, "center_crop": image_size},
+        }, f, indent=2)
+
+def fetch_preprocessed(dataset: str, raw_dir: Path) -> Callable[[Path], None]:
+    """Data cache fetcher building the preprocessed tree from a cached raw dataset."""
+    def fetch(directory: Path):
+        preprocess_dataset(dataset, raw_dir, directory)
+    return fetch
@@ -0,0 +1,96 @@
+"""Training-script templates.
+
+Templates are ``str.format`` files named ``<framework>_template.py`` or
+``<framework>_<model_family>_template.py`` in the template directory. Each
+one is parsed and compiled once when first used and kept in memory until
+its file changes on disk.
+"""
+import ast
+import os
+import string
+import threading
+from pathlib import Path
+from typing import Dict, Set
+
+DEFAULT_TEMPLATE_DIR = "/workspace/templates"
+DEFAULT_FRAMEWORK = "pytorch"
+
+class TemplateError(Exception):
+    pass
+
+class Template:
+    def __init__(self, path: Path, text: str, mtime_ns: int):
+        self.path = path
+        self.text = text
+        self.mtime_ns = mtime_ns
+        self.fields = self._fields(text)
+        self._check_syntax()
+
+    def _fields(self, text: str) -> Set[str]:
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise TemplateError(f"{self.path}: {e}") from e
+
+        fields = set()
+        for _, field, _, _ in parsed:
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise TemplateError(f"{self.path}: unsupported placeholder {{{field}}}")
+            fields.add(field)
+        return fields
+
+    def _check_syntax(self):
+        """Fail on load, not per job, if the filled-in script is not valid Python."""
+        sample = self.text.format(**{field: "0" for field in self.fields})
+        try:
+            ast.parse(sample, filename=str(self.path))
+        except SyntaxError as e:
+            raise TemplateError(f"{self.path}: rendered template is not valid Python: {e}") from e
+
+    def render(self, values: Dict[str, object]) -> str:
+        missing = self.fields - values.keys()
+        if missing:
+            raise TemplateError(f"{self.path.name} needs config keys: {', '.join(sorted(missing))}")
+        return self.text.format_map(values)
+
+class TemplateRegistry:
+    """Loads templates once and reloads them when their mtime changes."""
+
+    def __init__(self, template_dir: str = DEFAULT_TEMPLATE_DIR):
+        self.template_dir = Path(template_dir)
+        self._templates: Dict[Path, Template] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, config: dict) -> Path:
+        """Most specific template for the job's framework and model family."""
+        framework = config.get("framework") or DEFAULT_FRAMEWORK
+        family = config.get("model_family")
+
+        candidates = []
+        if family:
+            candidates.append(self.template_dir / f"{framework}_{family}_template.py")
+        candidates.append(self.template_dir / f"{framework}_template.py")
+
+        for path in candidates:
+            if path.is_file():
+                return path
+        raise TemplateError(f"No template for framework {framework!r} in {self.template_dir}")
+
+    def get(self, path: Path) -> Template:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as e:
+            raise TemplateError(f"Cannot read template {path}: {e}") from e
+
+        with self._lock:
+            template = self._templates.get(path)
+            if template is None or template.mtime_ns != mtime_ns:
+                template = Template(path, path.read_text(), mtime_ns)
+                self._templates[path] = template
+            return template
+
+    def render(self, config: dict, job_id: str) -> str:
+        template = self.get(self.resolve(config))
+        return template.render({**config, "job_id": job_id})
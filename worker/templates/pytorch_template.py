@@ -1,12 +1,23 @@
+import numpy as np
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, Dataset, Sampler
 from torchvision import datasets, transforms, models
 import json
 import os
+import time
+import math
+import queue
+import random
+import atexit
+import threading
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 
 # Job configuration
@@ -20,33 +31,187 @@ EPOCHS = {epochs}
 BATCH_SIZE = {batch_size}
 LEARNING_RATE = {learning_rate}
 OPTIMIZER = "{optimizer}"
+PRETRAINED = {pretrained}
+PERFORMANCE = {performance} or {{}}
+CHECKPOINT = {checkpoint} or {{}}
+PROFILING = {profiling} or {{}}
 
-def log_metric(step, metric_name, metric_value):
-    """Log metric to API."""
-    try:
-        requests.post(
-            f"{{API_URL}}/api/jobs/{{JOB_ID}}/metrics",
-            json={{
+# Set by torchrun when the worker launches several ranks
+WORLD_SIZE = int(os.getenv("WORLD_SIZE", "1"))
+RANK = int(os.getenv("RANK", "0"))
+LOCAL_RANK = int(os.getenv("LOCAL_RANK", "0"))
+DISTRIBUTED = WORLD_SIZE > 1
+# Rank 0 alone reports metrics, writes checkpoints and saves the model
+IS_MAIN = RANK == 0
+
+# Shared dataset cache prepared by the worker; download locally without it
+DATA_DIR = os.getenv("NEXUS_DATA_DIR")
+# Checkpoint of an earlier run of this job to continue from
+RESUME_FROM = os.getenv("NEXUS_RESUME_FROM")
+# Resized and cropped uint8 shards, if the worker preprocessed the dataset
+PREPROCESSED_DIR = os.getenv("NEXUS_PREPROCESSED_DIR")
+
+NORMALIZE_MEAN = [0.485, 0.456, 0.406]
+NORMALIZE_STD = [0.229, 0.224, 0.225]
+
+def api_session():
+    """Keep-alive session retrying with backoff while the API restarts.
+
+    Metric batches and artifact registrations are idempotent, so POSTs
+    are retried too.
+    """
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({{"GET", "POST", "DELETE"}}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(max_retries=retry))
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+# Metric batching
+METRIC_BATCH_SIZE = int(os.getenv("NEXUS_METRIC_BATCH_SIZE", "256"))
+METRIC_FLUSH_INTERVAL = float(os.getenv("NEXUS_METRIC_FLUSH_INTERVAL", "2.0"))
+METRIC_QUEUE_SIZE = int(os.getenv("NEXUS_METRIC_QUEUE_SIZE", "100000"))
+
+class MetricLogger:
+    """Buffers metrics and ships them to the batch endpoint from a background thread.
+
+    A batch is sent when it reaches ``max_batch`` points or ``flush_interval``
+    seconds have passed, and whatever is left is flushed at interpreter exit.
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, url, max_batch=METRIC_BATCH_SIZE, flush_interval=METRIC_FLUSH_INTERVAL):
+        self.url = url
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=METRIC_QUEUE_SIZE)
+        self._session = api_session()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="metric-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, step, metric_name, metric_value):
+        """Queue a metric point; never blocks the training loop."""
+        try:
+            self._queue.put_nowait({{
                 "step": step,
                 "metric_name": metric_name,
-                "metric_value": metric_value,
+                "metric_value": float(metric_value),
                 "timestamp": datetime.utcnow().isoformat()
-            }}
-        )
-    except Exception as e:
-        print(f"Failed to log metric: {{e}}")
+            }})
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=30.0):
+        """Flush buffered metrics and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._CLOSE)
+        self._thread.join(timeout)
+        if self.dropped:
+            print(f"Metric logger dropped {{self.dropped}} points (queue full)")
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            closing = False
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is self._CLOSE:
+                    closing = True
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            if closing or len(batch) >= self.max_batch or time.monotonic() >= deadline:
+                if batch:
+                    self._send(batch)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+            if closing:
+                return
+
+    def _send(self, batch):
+        try:
+            self._session.post(self.url, json=batch, timeout=(3, 10))
+        except Exception as e:
+            print(f"Failed to log {{len(batch)}} metrics: {{e}}")
+
+metric_logger = MetricLogger(f"{{API_URL}}/api/jobs/{{JOB_ID}}/metrics/batch") if IS_MAIN else None
+
+def log_metric(step, metric_name, metric_value):
+    """Log metric to API (buffered, sent in batches); a no-op off rank 0."""
+    if metric_logger is not None:
+        metric_logger.log(step, metric_name, metric_value)
 
 def get_model():
     """Load model based on config."""
+    weights = "DEFAULT" if PRETRAINED else None
     if MODEL_NAME == "resnet50":
-        return models.resnet50(pretrained=False)
+        return models.resnet50(weights=weights)
     elif MODEL_NAME == "resnet18":
-        return models.resnet18(pretrained=False)
+        return models.resnet18(weights=weights)
     else:
         raise ValueError(f"Unknown model: {{MODEL_NAME}}")
 
+class MemmapDataset(Dataset):
+    """Preprocessed images read from memory-mapped uint8 shards.
+
+    Samples are uint8 CHW tensors backed by the page cache, so only the
+    first epoch reads from disk. ``transform`` is for random augmentations
+    on those tensors; normalization is done per batch by ``normalize_batch``.
+    """
+
+    def __init__(self, root, transform=None):
+        self.root = Path(root)
+        with open(self.root / "index.json") as f:
+            self.index = json.load(f)
+        self.shape = tuple(self.index["shape"])
+        self.shard_size = self.index["shard_size"]
+        self.labels = np.load(self.root / self.index["labels"], mmap_mode="r")
+        self.transform = transform
+        # Mapped lazily so DataLoader workers each open their own maps
+        self._shards = None
+
+    def __len__(self):
+        return self.index["count"]
+
+    def __getitem__(self, i):
+        if self._shards is None:
+            self._shards = [
+                np.memmap(self.root / shard["images"], dtype=np.uint8, mode="c", shape=(shard["count"],) + self.shape)
+                for shard in self.index["shards"]
+            ]
+        shard, offset = divmod(i, self.shard_size)
+        image = torch.from_numpy(self._shards[shard][offset])
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, int(self.labels[i])
+
+def normalize_batch(data):
+    """uint8 batch from MemmapDataset -> normalized float batch, on data's device."""
+    mean = torch.tensor(NORMALIZE_MEAN, device=data.device).view(1, 3, 1, 1)
+    std = torch.tensor(NORMALIZE_STD, device=data.device).view(1, 3, 1, 1)
+    return data.float().div_(255).sub_(mean).div_(std)
+
 def get_dataset():
     """Load dataset based on config."""
+    if PREPROCESSED_DIR:
+        return MemmapDataset(PREPROCESSED_DIR)
+
     transform = transforms.Compose([
         transforms.Resize(256),
         transforms.CenterCrop(224),
@@ -57,24 +222,368 @@ def get_dataset():
     
     if DATASET == "cifar10":
         train_dataset = datasets.CIFAR10(
-            root='./data',
+            root=DATA_DIR or './data',
             train=True,
-            download=True,
+            download=DATA_DIR is None,
             transform=transform
         )
         return train_dataset
     else:
         raise ValueError(f"Unknown dataset: {{DATASET}}")
 
+def to_cpu(obj):
+    """Copy of ``obj`` with every tensor copied to CPU memory."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {{key: to_cpu(value) for key, value in obj.items()}}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(to_cpu(value) for value in obj)
+    return obj
+
+class CheckpointWriter:
+    """Writes checkpoints from a background thread and prunes old ones.
+
+    ``save`` snapshots the state into CPU memory and returns; the writer
+    thread serializes it to a temporary file and renames it into place.
+    At most one checkpoint is in flight, so a slow disk delays the next
+    save instead of growing memory. After each write the newest
+    ``keep_last`` and the ``keep_best`` lowest-loss checkpoints are kept
+    and the rest deleted; checkpoints saved without a loss are only ranked
+    by step. Files are registered as job artifacts.
+    """
+
+    def __init__(self, directory, keep_last=3, keep_best=1):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.artifacts_url = f"{{API_URL}}/api/jobs/{{JOB_ID}}/artifacts"
+        self.index_path = self.directory / "index.json"
+        self.index = self._load_index()
+        self._session = api_session()
+        self._pending = None
+        atexit.register(self.wait)
+
+    def save(self, step, loss, state):
+        self.wait()
+        snapshot = to_cpu(state)
+        self._pending = threading.Thread(
+            target=self._write,
+            args=(step, loss, snapshot),
+            name="checkpoint-writer",
+            daemon=True
+        )
+        self._pending.start()
+
+    def wait(self):
+        """Block until the checkpoint in flight, if any, is on disk."""
+        if self._pending is not None:
+            self._pending.join()
+            self._pending = None
+
+    def _write(self, step, loss, snapshot):
+        path = self.directory / f"checkpoint_step_{{step:09d}}.pt"
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            torch.save(snapshot, tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"Failed to write checkpoint {{path.name}}: {{e}}")
+            tmp.unlink(missing_ok=True)
+            return
+
+        self.index = [entry for entry in self.index if entry["path"] != path.name]
+        self.index.append({{"path": path.name, "step": step, "loss": loss}})
+        self._request("post", json={{
+            "artifact_type": "checkpoint",
+            "file_path": str(path.resolve()),
+            "file_size": path.stat().st_size
+        }})
+        self._prune()
+
+    def _prune(self):
+        newest = sorted(self.index, key=lambda entry: entry["step"], reverse=True)
+        best = sorted((entry for entry in self.index if entry["loss"] is not None), key=lambda entry: entry["loss"])
+        keep = {{entry["path"] for entry in newest[:self.keep_last] + best[:self.keep_best]}}
+
+        for entry in self.index:
+            if entry["path"] not in keep:
+                path = self.directory / entry["path"]
+                path.unlink(missing_ok=True)
+                self._request("delete", params={{"file_path": str(path.resolve())}})
+        self.index = [entry for entry in self.index if entry["path"] in keep]
+
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def _request(self, method, **kwargs):
+        try:
+            self._session.request(method, self.artifacts_url, timeout=(3, 10), **kwargs)
+        except Exception as e:
+            print(f"Failed to update checkpoint artifacts: {{e}}")
+
+class StepProfiler:
+    """Times the phases of each training step and reports them every ``interval`` steps.
+
+    ``mark(phase)`` charges the time since the previous mark to ``phase``;
+    ``data`` is the wait for the next batch. With ``sync_cuda`` the GPU is
+    synchronized at each mark so queued kernels are charged to the phase
+    that launched them. Reported per window (rank 0): samples/sec, the
+    data-wait fraction, mean milliseconds per phase and step-time
+    percentiles. Disabled, every call returns immediately.
+
+    With ``trace`` a ``torch.profiler`` trace of a few steps is written to
+    ./profiles and registered as a ``profile`` artifact.
+    """
+
+    PHASES = ("data", "h2d", "forward", "backward", "optimizer", "logging")
+
+    def __init__(self, config, device):
+        self.enabled = bool(config)
+        config = config or {{}}
+        self.interval = config.get("interval", 50)
+        self.sync = self.enabled and config.get("sync_cuda", True) and device.type == "cuda"
+        self.device = device
+        self._last = None
+        self._step_start = None
+        self._reset()
+
+        self._torch_profiler = None
+        if self.enabled and config.get("trace") and IS_MAIN:
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if device.type == "cuda":
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self._trace_steps = config.get("trace_wait", 10) + config.get("trace_warmup", 2) + config.get("trace_steps", 5)
+            self._torch_profiler = torch.profiler.profile(
+                activities=activities,
+                schedule=torch.profiler.schedule(
+                    wait=config.get("trace_wait", 10),
+                    warmup=config.get("trace_warmup", 2),
+                    active=config.get("trace_steps", 5),
+                    repeat=1
+                ),
+                on_trace_ready=self._save_trace
+            )
+            self._torch_profiler.start()
+
+    def _reset(self):
+        self.totals = dict.fromkeys(self.PHASES, 0.0)
+        self.step_times = []
+        self.samples = 0
+
+    def begin(self):
+        """Restart the clock, e.g. after epoch-end work that is not part of a step."""
+        if self.enabled:
+            self._last = self._step_start = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        if self.sync:
+            torch.cuda.synchronize(self.device)
+        now = time.perf_counter()
+        self.totals[phase] += now - self._last
+        self._last = now
+
+    def end_step(self, global_step, samples):
+        """Close the step (the rest is charged to ``logging``) and report full windows."""
+        if not self.enabled:
+            return
+        self.mark("logging")
+        self.step_times.append(self._last - self._step_start)
+        self._step_start = self._last
+        self.samples += samples
+
+        if self._torch_profiler is not None:
+            self._torch_profiler.step()
+            self._trace_steps -= 1
+            if self._trace_steps <= 0:
+                self._torch_profiler.stop()
+                self._torch_profiler = None
+
+        if len(self.step_times) >= self.interval:
+            self._report(global_step)
+            self._reset()
+        # Reporting is not part of any step
+        self._last = self._step_start = time.perf_counter()
+
+    def _report(self, global_step):
+        if not IS_MAIN:
+            return
+        elapsed = sum(self.step_times)
+        times = sorted(self.step_times)
+        percentile = lambda q: times[min(len(times) - 1, int(q * len(times)))]
+        log_metric(global_step, "profile_samples_per_sec", WORLD_SIZE * self.samples / max(elapsed, 1e-9))
+        log_metric(global_step, "profile_data_wait_fraction", self.totals["data"] / max(elapsed, 1e-9))
+        for phase in self.PHASES:
+            log_metric(global_step, f"profile_{{phase}}_ms", 1000 * self.totals[phase] / len(times))
+        log_metric(global_step, "profile_step_time_p50_ms", 1000 * percentile(0.50))
+        log_metric(global_step, "profile_step_time_p90_ms", 1000 * percentile(0.90))
+        log_metric(global_step, "profile_step_time_p99_ms", 1000 * percentile(0.99))
+
+    def _save_trace(self, prof):
+        directory = Path("./profiles")
+        directory.mkdir(exist_ok=True)
+        path = directory / f"trace_step_{{prof.step_num}}.json"
+        prof.export_chrome_trace(str(path))
+        print(f"Wrote profiler trace {{path}}")
+        try:
+            api_session().post(
+                f"{{API_URL}}/api/jobs/{{JOB_ID}}/artifacts",
+                json={{"artifact_type": "profile", "file_path": str(path.resolve()), "file_size": path.stat().st_size}},
+                timeout=(3, 10)
+            )
+        except Exception as e:
+            print(f"Failed to register profiler trace: {{e}}")
+
+    def close(self):
+        """Stop a trace still in progress (short runs)."""
+        if self._torch_profiler is not None:
+            self._torch_profiler.stop()
+            self._torch_profiler = None
+
+class ResumableSampler(Sampler):
+    """Distributed sampler that can restart in the middle of an epoch.
+
+    Every rank draws the same per-epoch permutation, pads it to a multiple
+    of ``world_size`` like ``DistributedSampler`` and takes every
+    ``world_size``-th index.
+    """
+
+    def __init__(self, size, rank=0, world_size=1, seed=0):
+        self.size = size
+        self.rank = rank
+        self.world_size = world_size
+        self.seed = seed
+        self.per_rank = math.ceil(size / world_size)
+        self.epoch = 0
+        self.skip = 0
+
+    def set_epoch(self, epoch, skip=0):
+        """Shuffle for ``epoch``, leaving out this rank's first ``skip`` samples."""
+        self.epoch = epoch
+        self.skip = skip
+
+    def __iter__(self):
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+        indices = torch.randperm(self.size, generator=generator).tolist()
+        indices += indices[:self.per_rank * self.world_size - self.size]
+        return iter(indices[self.rank::self.world_size][self.skip:])
+
+    def __len__(self):
+        return self.per_rank - self.skip
+
+def rng_state():
+    return {{
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+        "cuda": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+    }}
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if state["cuda"] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+def checkpoint_state(model, optimizer, epoch, global_step, stats):
+    return {{
+        "epoch": epoch,
+        "global_step": global_step,
+        "epoch_stats": dict(stats),
+        "model_state_dict": model.state_dict(),
+        "optimizer_state_dict": optimizer.state_dict(),
+        "loss": stats["loss"] / max(stats["batches"], 1),
+        "rng_state": rng_state(),
+    }}
+
+def load_checkpoint(model, optimizer):
+    """Restore RESUME_FROM; returns (epoch, global step, stats of that epoch so far)."""
+    checkpoint = torch.load(RESUME_FROM, map_location="cpu", weights_only=False)
+    model.load_state_dict(checkpoint["model_state_dict"])
+    optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+    if checkpoint.get("rng_state") is not None:
+        set_rng_state(checkpoint["rng_state"])
+    print(f"Resumed from {{RESUME_FROM}} at step {{checkpoint['global_step']}}")
+    return checkpoint["epoch"], checkpoint["global_step"], checkpoint["epoch_stats"]
+
+def resolve_performance(device):
+    """Fill unset PERFORMANCE fields from the CPUs and memory allocated to the job."""
+    cpus = int(os.getenv("NEXUS_CPU_COUNT", os.cpu_count() or 1))
+    memory_gb = int(os.getenv("NEXUS_MEMORY_GB", "16"))
+    profile = {{key: value for key, value in PERFORMANCE.items() if value is not None}}
+
+    if device.type == "cuda":
+        # Loader workers feed the GPU; the main process needs little CPU
+        workers = min(8, max(1, cpus - 1))
+        threads = max(1, min(4, cpus - workers))
+    else:
+        # Compute runs on the CPU: keep most cores for intra-op threads
+        workers = min(4, cpus // 4)
+        threads = max(1, cpus - workers)
+    # Roughly 2 GB per loader worker for prefetched batches and its own heap
+    workers = min(workers, max(0, memory_gb // 2 - 1))
+
+    profile.setdefault("num_workers", workers)
+    profile.setdefault("num_threads", threads)
+    profile.setdefault("pin_memory", device.type == "cuda")
+    profile.setdefault("persistent_workers", profile["num_workers"] > 0)
+    profile.setdefault("prefetch_factor", 2 if profile["num_workers"] > 0 else None)
+    profile.setdefault("channels_last", False)
+    profile.setdefault("bf16", False)
+    profile.setdefault("compile", False)
+    return profile
+
+def setup_device():
+    """Join the process group when launched with several ranks; returns the device."""
+    use_cuda = torch.cuda.is_available()
+    if DISTRIBUTED:
+        backend = os.getenv("NEXUS_DIST_BACKEND") or ("nccl" if use_cuda else "gloo")
+        if use_cuda:
+            torch.cuda.set_device(LOCAL_RANK)
+        dist.init_process_group(backend=backend)
+        print(f"Rank {{RANK}}/{{WORLD_SIZE}} joined the {{backend}} process group")
+    if use_cuda:
+        return torch.device("cuda", LOCAL_RANK)
+    return torch.device("cpu")
+
 def train():
     """Main training loop."""
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    device = setup_device()
     print(f"Using device: {{device}}")
     
+    perf = resolve_performance(device)
+    print(f"Performance profile: {{perf}}")
+    torch.set_num_threads(perf["num_threads"])
+    memory_format = torch.channels_last if perf["channels_last"] else torch.contiguous_format
+    
     # Load model and dataset
-    model = get_model().to(device)
+    model = get_model().to(device, memory_format=memory_format)
     dataset = get_dataset()
-    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True, num_workers=4)
+    sampler = ResumableSampler(len(dataset), rank=RANK, world_size=WORLD_SIZE)
+    dataloader = DataLoader(
+        dataset,
+        batch_size=BATCH_SIZE,
+        sampler=sampler,
+        num_workers=perf["num_workers"],
+        pin_memory=perf["pin_memory"],
+        persistent_workers=perf["persistent_workers"] and perf["num_workers"] > 0,
+        prefetch_factor=perf["prefetch_factor"] if perf["num_workers"] > 0 else None
+    )
+    batches_per_epoch = len(dataloader)
     
     # Setup optimizer and loss
     criterion = nn.CrossEntropyLoss()
@@ -85,62 +594,131 @@ def train():
     else:
         raise ValueError(f"Unknown optimizer: {{OPTIMIZER}}")
     
+    # Checkpoints keep saving the unwrapped, uncompiled module's state dict
+    forward = model
+    if DISTRIBUTED:
+        forward = DistributedDataParallel(model, device_ids=[LOCAL_RANK] if device.type == "cuda" else None)
+    if perf["compile"]:
+        forward = torch.compile(forward)
+    
+    writer = None
+    if IS_MAIN:
+        writer = CheckpointWriter(
+            "./checkpoints",
+            keep_last=CHECKPOINT.get("keep_last", 3),
+            keep_best=CHECKPOINT.get("keep_best", 1)
+        )
+    every_steps = CHECKPOINT.get("every_steps")
+    profiler = StepProfiler(PROFILING, device)
+    
+    start_epoch, global_step, epoch_stats = 0, 0, None
+    if RESUME_FROM:
+        start_epoch, global_step, epoch_stats = load_checkpoint(model, optimizer)
+        if epoch_stats["batches"] >= batches_per_epoch:
+            start_epoch, epoch_stats = start_epoch + 1, None
+    
     # Training loop
-    global_step = 0
-    for epoch in range(EPOCHS):
+    for epoch in range(start_epoch, EPOCHS):
         model.train()
-        epoch_loss = 0.0
-        correct = 0
-        total = 0
+        stats = epoch_stats or {{"loss": 0.0, "batches": 0, "correct": 0, "total": 0}}
+        epoch_stats = None
+        sampler.set_epoch(epoch, skip=stats["batches"] * BATCH_SIZE)
+        epoch_start = time.perf_counter()
+        epoch_samples = 0
+        window_start, window_samples = epoch_start, 0
+        profiler.begin()
         
-        for batch_idx, (data, target) in enumerate(dataloader):
-            data, target = data.to(device), target.to(device)
+        for data, target in dataloader:
+            profiler.mark("data")
+            batch_idx = stats["batches"]
+            data = data.to(device, non_blocking=perf["pin_memory"])
+            target = target.to(device, non_blocking=perf["pin_memory"])
+            if data.dtype == torch.uint8:
+                data = normalize_batch(data)
+            data = data.contiguous(memory_format=memory_format)
+            profiler.mark("h2d")
             
             optimizer.zero_grad()
-            output = model(data)
-            loss = criterion(output, target)
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=perf["bf16"]):
+                output = forward(data)
+                loss = criterion(output, target)
+            profiler.mark("forward")
             loss.backward()
+            profiler.mark("backward")
             optimizer.step()
+            profiler.mark("optimizer")
             
             # Calculate accuracy
             _, predicted = output.max(1)
-            total += target.size(0)
-            correct += predicted.eq(target).sum().item()
+            stats["total"] += target.size(0)
+            stats["correct"] += predicted.eq(target).sum().item()
             
-            epoch_loss += loss.item()
+            stats["loss"] += loss.item()
+            stats["batches"] += 1
             global_step += 1
+            epoch_samples += target.size(0)
+            window_samples += target.size(0)
             
             # Log metrics every 10 batches
-            if batch_idx % 10 == 0:
+            if IS_MAIN and batch_idx % 10 == 0:
+                now = time.perf_counter()
+                # Ranks step in lockstep through DDP, so scale rank 0's rate
+                samples_per_sec = WORLD_SIZE * window_samples / max(now - window_start, 1e-9)
+                window_start, window_samples = now, 0
+                accuracy = 100. * stats["correct"] / stats["total"]
                 log_metric(global_step, "train_loss", loss.item())
-                log_metric(global_step, "train_accuracy", 100. * correct / total)
+                log_metric(global_step, "train_accuracy", accuracy)
+                log_metric(global_step, "samples_per_sec", samples_per_sec)
                 
-                print(f"Epoch: {{epoch+1}}/{{EPOCHS}} | Batch: {{batch_idx}}/{{len(dataloader)}} | "
-                      f"Loss: {{loss.item():.4f}} | Acc: {{100.*correct/total:.2f}}%")
+                print(f"Epoch: {{epoch+1}}/{{EPOCHS}} | Batch: {{batch_idx}}/{{batches_per_epoch}} | "
+                      f"Loss: {{loss.item():.4f}} | Acc: {{accuracy:.2f}}% | "
+                      f"{{samples_per_sec:.1f}} samples/s")
+            
+            # Mid-epoch checkpoints; the epoch-end one follows below. Their
+            # partial, single-rank loss is not comparable to an epoch's, so
+            # they are saved without one and only count toward keep_last
+            if writer and every_steps and global_step % every_steps == 0 and stats["batches"] < batches_per_epoch:
+                writer.save(global_step, None, checkpoint_state(model, optimizer, epoch, global_step, stats))
+            
+            profiler.end_step(global_step, target.size(0))
         
-        # Log epoch metrics
-        avg_loss = epoch_loss / len(dataloader)
-        accuracy = 100. * correct / total
-        log_metric(global_step, "epoch_loss", avg_loss)
-        log_metric(global_step, "epoch_accuracy", accuracy)
+        # Log epoch metrics, summed over all ranks
+        totals = [stats["loss"], stats["batches"], stats["correct"], stats["total"], epoch_samples]
+        if DISTRIBUTED:
+            reduced = torch.tensor(totals, dtype=torch.float64, device=device)
+            dist.all_reduce(reduced)
+            totals = reduced.tolist()
+        loss_sum, batches, correct, total, samples = totals
+        avg_loss = loss_sum / max(batches, 1)
+        accuracy = 100. * correct / max(total, 1)
+        epoch_samples_per_sec = samples / max(time.perf_counter() - epoch_start, 1e-9)
         
-        print(f"Epoch {{epoch+1}} completed: Avg Loss: {{avg_loss:.4f}}, Accuracy: {{accuracy:.2f}}%")
+        if IS_MAIN:
+            log_metric(global_step, "epoch_loss", avg_loss)
+            log_metric(global_step, "epoch_accuracy", accuracy)
+            log_metric(global_step, "epoch_samples_per_sec", epoch_samples_per_sec)
+            
+            print(f"Epoch {{epoch+1}} completed: Avg Loss: {{avg_loss:.4f}}, Accuracy: {{accuracy:.2f}}%, "
+                  f"{{epoch_samples_per_sec:.1f}} samples/s")
+        
+        if writer:
+            writer.save(global_step, avg_loss, checkpoint_state(model, optimizer, epoch, global_step, stats))
+    
+    profiler.close()
+    if IS_MAIN:
+        writer.wait()
         
-        # Save checkpoint
-        checkpoint_dir = Path("./checkpoints")
-        checkpoint_dir.mkdir(exist_ok=True)
-        torch.save({{
-            'epoch': epoch,
-            'model_state_dict': model.state_dict(),
-            'optimizer_state_dict': optimizer.state_dict(),
-            'loss': avg_loss,
-        }}, checkpoint_dir / f"checkpoint_epoch_{{epoch+1}}.pt")
+        # Save final model
+        output_dir = Path("./output")
+        output_dir.mkdir(exist_ok=True)
+        torch.save(model.state_dict(), output_dir / "final_model.pt")
+        metric_logger.close()
     
-    # Save final model
-    output_dir = Path("./output")
-    output_dir.mkdir(exist_ok=True)
-    torch.save(model.state_dict(), output_dir / "final_model.pt")
-    print("Training completed!")
+    if DISTRIBUTED:
+        dist.barrier()
+        dist.destroy_process_group()
+    if IS_MAIN:
+        print("Training completed!")
 
 if __name__ == "__main__":
     train()